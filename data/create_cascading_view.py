@@ -4,16 +4,16 @@ Create cascading view showing how fills update the client order
 This simulates how the client sees their order updating in real-time
 """
 
-import json
 from datetime import datetime
+from itertools import accumulate
+from operator import itemgetter
+
+from json_io import read_json, write_json
 
 def create_cascading_view():
     # Load the properly structured data
-    with open('vwap_proper_orders.json', 'r') as f:
-        orders = json.load(f)
-    
-    with open('vwap_proper_fills.json', 'r') as f:
-        fills = json.load(f)
+    orders = read_json('vwap_proper_orders.json')
+    fills = read_json('vwap_proper_fills.json')
     
     # Find the client order (Level 0)
     client_order = [o for o in orders if o['order_level'] == 0][0]
@@ -25,7 +25,7 @@ def create_cascading_view():
     print(f"Total Quantity: {client_order['quantity']:,}")
     
     # Get all fills and sort by timestamp
-    fills.sort(key=lambda x: x['timestamp'])
+    fills.sort(key=itemgetter('timestamp'))
     
     # Create cascading updates - each fill updates the client order
     cascading_updates = []
@@ -52,33 +52,36 @@ def create_cascading_view():
     })
     
     # Process each fill and show how it updates the client order
-    cumulative_qty = 0
-    cumulative_value = 0
-    cumulative_commission = 0
-    cumulative_fees = 0
+    # Running totals are folded in C by accumulate rather than += per fill
+    running_totals = zip(
+        accumulate(fill['quantity'] for fill in fills),
+        accumulate(fill['quantity'] * fill['price'] for fill in fills),
+        accumulate(fill.get('commission', 0) for fill in fills),
+        accumulate(fill.get('fees', 0) for fill in fills)
+    )
     
-    for fill in fills:
-        cumulative_qty += fill['quantity']
-        cumulative_value += fill['quantity'] * fill['price']
-        cumulative_commission += fill.get('commission', 0)
-        cumulative_fees += fill.get('fees', 0)
-        
+    # Client order fields don't change between fills
+    ticker = client_order['ticker']
+    side = client_order['side']
+    ordered_qty = client_order['quantity']
+    
+    for fill, (cumulative_qty, cumulative_value, cumulative_commission, cumulative_fees) in zip(fills, running_totals):
         avg_price = cumulative_value / cumulative_qty if cumulative_qty > 0 else 0
         
         # This is what the client sees after each fill
         cascading_updates.append({
             'update_time': fill['timestamp'],
             'update_type': 'Fill',
-            'order_id': client_order['order_id'],
+            'order_id': root_order_id,
             'client_order_id': client_order_id,
-            'ticker': client_order['ticker'],
-            'side': client_order['side'],
-            'ordered_quantity': client_order['quantity'],
+            'ticker': ticker,
+            'side': side,
+            'ordered_quantity': ordered_qty,
             'filled_quantity': cumulative_qty,
-            'remaining_quantity': client_order['quantity'] - cumulative_qty,
-            'fill_percentage': round((cumulative_qty / client_order['quantity']) * 100, 2),
+            'remaining_quantity': ordered_qty - cumulative_qty,
+            'fill_percentage': round((cumulative_qty / ordered_qty) * 100, 2),
             'average_price': round(avg_price, 4),
-            'state': 'Working' if cumulative_qty < client_order['quantity'] else 'Filled',
+            'state': 'Working' if cumulative_qty < ordered_qty else 'Filled',
             'last_fill_venue': fill['venue'],
             'last_fill_quantity': fill['quantity'],
             'last_fill_price': fill['price'],
@@ -87,16 +90,17 @@ def create_cascading_view():
         })
     
     # Save cascading view
-    with open('vwap_cascading_view.json', 'w') as f:
-        json.dump(cascading_updates, f, indent=2)
+    write_json('vwap_cascading_view.json', cascading_updates, indent=True)
     
     # Also create CSV
     import csv
     with open('vwap_cascading_view.csv', 'w', newline='') as f:
         if cascading_updates:
-            writer = csv.DictWriter(f, fieldnames=cascading_updates[0].keys())
-            writer.writeheader()
-            writer.writerows(cascading_updates)
+            # Every row has the same keys, so pull values out with one itemgetter
+            fieldnames = list(cascading_updates[0])
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(map(itemgetter(*fieldnames), cascading_updates))
     
     print(f"\n✅ Created vwap_cascading_view with {len(cascading_updates)} updates")
     print(f"   (1 acceptance + {len(fills)} fills)")
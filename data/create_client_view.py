@@ -4,60 +4,75 @@ Create simplified client view of VWAP execution
 Shows only what the client sees: accumulated fills over time
 """
 
-import json
 from datetime import datetime
+from itertools import accumulate
+from operator import itemgetter
+
+from json_io import read_json, write_json
 
 def create_client_view():
     # Load the data
-    with open('vwap_example_orders.json', 'r') as f:
-        orders = json.load(f)
-    
-    with open('vwap_example_fills.json', 'r') as f:
-        fills = json.load(f)
+    orders = read_json('vwap_example_orders.json')
+    fills = read_json('vwap_example_fills.json')
     
     # Find parent order
     parent = [o for o in orders if not o.get('parent_order_id')][0]
     parent_id = parent['order_id']
     
+    # Bucket fills by root order so each parent is a single lookup
+    fills_by_root = {}
+    for fill in fills:
+        fills_by_root.setdefault(fill.get('root_order_id'), []).append(fill)
+    
     # Get all fills for this parent
-    parent_fills = [f for f in fills if f.get('root_order_id') == parent_id]
+    parent_fills = fills_by_root.get(parent_id, [])
     
     # Sort by timestamp
-    parent_fills.sort(key=lambda x: x['timestamp'])
+    parent_fills.sort(key=itemgetter('timestamp'))
     
     # Create client view with cumulative updates
     client_updates = []
     cumulative_qty = 0
     cumulative_value = 0
     
-    for fill in parent_fills:
-        cumulative_qty += fill['quantity']
-        cumulative_value += fill['quantity'] * fill['price']
+    # Cumulative quantity and value per fill
+    running_totals = zip(
+        accumulate(fill['quantity'] for fill in parent_fills),
+        accumulate(fill['quantity'] * fill['price'] for fill in parent_fills)
+    )
+    
+    seen_venues = set()
+    client_name = parent['client_name']
+    ticker = parent['ticker']
+    side = parent['side']
+    ordered_qty = parent['quantity']
+    
+    for i, (fill, (cumulative_qty, cumulative_value)) in enumerate(zip(parent_fills, running_totals), 1):
+        seen_venues.add(fill['venue'])
         avg_price = cumulative_value / cumulative_qty if cumulative_qty > 0 else 0
         
         client_update = {
             'timestamp': fill['timestamp'],
             'order_id': parent_id,
-            'client_name': parent['client_name'],
-            'ticker': parent['ticker'],
-            'side': parent['side'],
-            'ordered_quantity': parent['quantity'],
+            'client_name': client_name,
+            'ticker': ticker,
+            'side': side,
+            'ordered_quantity': ordered_qty,
             'filled_quantity': cumulative_qty,
-            'remaining_quantity': parent['quantity'] - cumulative_qty,
-            'fill_percentage': round((cumulative_qty / parent['quantity']) * 100, 2),
+            'remaining_quantity': ordered_qty - cumulative_qty,
+            'fill_percentage': round((cumulative_qty / ordered_qty) * 100, 2),
             'average_price': round(avg_price, 4),
             'last_fill_price': fill['price'],
             'last_fill_qty': fill['quantity'],
             'last_fill_venue': fill['venue'],
-            'total_venues_used': len(set(f['venue'] for f in parent_fills[:parent_fills.index(fill)+1])),
-            'total_fills': parent_fills.index(fill) + 1,
-            'status': 'Working' if cumulative_qty < parent['quantity'] else 'Filled'
+            'total_venues_used': len(seen_venues),
+            'total_fills': i,
+            'status': 'Working' if cumulative_qty < ordered_qty else 'Filled'
         }
         client_updates.append(client_update)
     
     # Save client view
-    with open('vwap_client_view.json', 'w') as f:
-        json.dump(client_updates, f, indent=2)
+    write_json('vwap_client_view.json', client_updates, indent=True)
     
     print(f"Created vwap_client_view.json with {len(client_updates)} updates")
     print(f"Final fill: {cumulative_qty:,} / {parent['quantity']:,} ({cumulative_qty/parent['quantity']*100:.1f}%)")
@@ -76,15 +91,14 @@ def create_client_view():
         'average_price': round(cumulative_value / cumulative_qty if cumulative_qty > 0 else 0, 4),
         'total_commission': sum(f.get('commission', 0) for f in parent_fills),
         'total_fees': sum(f.get('fees', 0) for f in parent_fills),
-        'venues_used': list(set(f['venue'] for f in parent_fills)),
+        'venues_used': list(seen_venues),
         'first_fill_time': parent_fills[0]['timestamp'] if parent_fills else None,
         'last_fill_time': parent_fills[-1]['timestamp'] if parent_fills else None,
         'total_fills': len(parent_fills),
         'status': parent['state']
     }
     
-    with open('vwap_summary.json', 'w') as f:
-        json.dump([summary], f, indent=2)
+    write_json('vwap_summary.json', [summary], indent=True)
     
     print(f"Created vwap_summary.json with parent order summary")
     
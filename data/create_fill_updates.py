@@ -4,34 +4,47 @@ Create fill updates that show each fill as a separate event
 This creates a dataset where each row represents a fill event with running totals
 """
 
-import json
 from datetime import datetime
+from itertools import accumulate
+from operator import itemgetter
+
+from json_io import read_json, write_json
 
 def create_fill_updates():
     # Load the data
-    with open('vwap_example_orders.json', 'r') as f:
-        orders = json.load(f)
-    
-    with open('vwap_example_fills.json', 'r') as f:
-        fills = json.load(f)
+    orders = read_json('vwap_example_orders.json')
+    fills = read_json('vwap_example_fills.json')
     
     # Find parent order
     parent = [o for o in orders if not o.get('parent_order_id')][0]
     parent_id = parent['order_id']
     
+    # Group fills by root order
+    fills_by_root = {}
+    for fill in fills:
+        fills_by_root.setdefault(fill.get('root_order_id'), []).append(fill)
+    
     # Get all fills for this parent and sort by time
-    parent_fills = [f for f in fills if f.get('root_order_id') == parent_id]
-    parent_fills.sort(key=lambda x: x['timestamp'])
+    parent_fills = fills_by_root.get(parent_id, [])
+    parent_fills.sort(key=itemgetter('timestamp'))
     
     # Create individual fill events with running totals
     fill_events = []
-    running_total = 0
-    running_value = 0
     
-    for i, fill in enumerate(parent_fills, 1):
-        running_total += fill['quantity']
-        running_value += fill['quantity'] * fill['price']
-        
+    # Running totals for each fill event
+    running_totals = zip(
+        accumulate(fill['quantity'] for fill in parent_fills),
+        accumulate(fill['quantity'] * fill['price'] for fill in parent_fills)
+    )
+    
+    client_order_id = parent['client_order_id']
+    client_name = parent['client_name']
+    ticker = parent['ticker']
+    side = parent['side']
+    ordered_qty = parent['quantity']
+    total_fills = len(parent_fills)
+    
+    for i, (fill, (running_total, running_value)) in enumerate(zip(parent_fills, running_totals), 1):
         fill_event = {
             # Event info
             'event_id': f"FILL_{i:04d}",
@@ -40,10 +53,10 @@ def create_fill_updates():
             
             # Order info
             'order_id': parent_id,
-            'client_order_id': parent['client_order_id'],
-            'client_name': parent['client_name'],
-            'ticker': parent['ticker'],
-            'side': parent['side'],
+            'client_order_id': client_order_id,
+            'client_name': client_name,
+            'ticker': ticker,
+            'side': side,
             
             # This fill
             'fill_id': fill['fill_id'],
@@ -52,22 +65,21 @@ def create_fill_updates():
             'fill_venue': fill['venue'],
             
             # Running totals
-            'total_ordered': parent['quantity'],
+            'total_ordered': ordered_qty,
             'total_filled': running_total,
-            'total_remaining': parent['quantity'] - running_total,
-            'fill_percentage': round((running_total / parent['quantity']) * 100, 2),
+            'total_remaining': ordered_qty - running_total,
+            'fill_percentage': round((running_total / ordered_qty) * 100, 2),
             'average_price': round(running_value / running_total, 4),
             
             # Progress
             'fill_number': i,
-            'total_fills': len(parent_fills),
-            'is_complete': running_total >= parent['quantity']
+            'total_fills': total_fills,
+            'is_complete': running_total >= ordered_qty
         }
         fill_events.append(fill_event)
     
     # Save as fill events
-    with open('vwap_fill_events.json', 'w') as f:
-        json.dump(fill_events, f, indent=2)
+    write_json('vwap_fill_events.json', fill_events, indent=True)
     
     print(f"Created vwap_fill_events.json with {len(fill_events)} fill events")
     
@@ -75,9 +87,11 @@ def create_fill_updates():
     import csv
     with open('vwap_fill_events.csv', 'w', newline='') as f:
         if fill_events:
-            writer = csv.DictWriter(f, fieldnames=fill_events[0].keys())
-            writer.writeheader()
-            writer.writerows(fill_events)
+            # Fill events all share one schema
+            fieldnames = list(fill_events[0])
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(map(itemgetter(*fieldnames), fill_events))
     
     print(f"Created vwap_fill_events.csv with {len(fill_events)} fill events")
     
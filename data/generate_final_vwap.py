@@ -5,14 +5,17 @@ Optimized for realistic volumes while staying under 100k rows
 Configurable parameters for different scenarios
 """
 
-import json
 import csv
+import os
 import random
+import sys
 import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, NamedTuple, Optional, Tuple
 from enum import Enum
 
+from json_io import dumps_json
+
 class Urgency(Enum):
     PASSIVE = "PASSIVE"
     NORMAL = "NORMAL"
@@ -26,13 +29,177 @@ class VenueResult(Enum):
     REJECT = "REJECT"
     NO_CONN = "NO_CONNECTION"
 
+VENUE_NAMES = tuple(sys.intern(venue) for venue in ('NYSE', 'NASDAQ', 'ARCA', 'BATS', 'DARK'))
+
+# Values repeated on every row - interned once so all rows share one object
+TICKER = sys.intern('ASML.AS')
+SIDE = sys.intern('Buy')
+CLIENT_ORDER_ID = sys.intern('C20241216_MEGA')
+
+# Per-route strings built once up front rather than formatted for each route
+VENUE_STATES = {result: result.value for result in VenueResult}
+VENUE_EVENT_TYPES = {result: sys.intern(f'VENUE_{result.value}') for result in VenueResult}
+NO_CONNECTION_REASONS = {venue: sys.intern(f'No connection to {venue}-FIX-01') for venue in VENUE_NAMES}
+
+# Urgency levels the VWAP schedule escalates through, indexed 0-2
+URGENCY_LEVELS = (Urgency.NORMAL, Urgency.URGENT, Urgency.CRITICAL)
+URGENCY_VALUES = tuple(urgency.value for urgency in URGENCY_LEVELS)
+
+class UrgencyParams(NamedTuple):
+    """Slice sizing and routing behaviour for one urgency level"""
+    slice_min: int
+    slice_max: int
+    slippage: Tuple[float, float]
+    num_routes: int
+
+class Snapshot(NamedTuple):
+    """One snapshot row - fields a record does not carry are left as None"""
+    order_id: str
+    parent_order_id: Optional[str] = None
+    client_order_id: Optional[str] = None
+    order_level: Optional[int] = None
+    order_type: Optional[str] = None
+    ticker: Optional[str] = None
+    side: Optional[str] = None
+    quantity: Optional[int] = None
+    filled_quantity: Optional[int] = None
+    remaining_quantity: Optional[int] = None
+    average_price: Optional[float] = None
+    state: Optional[str] = None
+    algo_strategy: Optional[str] = None
+    urgency: Optional[str] = None
+    venue: Optional[str] = None
+    hour: Optional[int] = None
+    snapshot_time: Optional[str] = None
+    event_type: Optional[str] = None
+    record_id: Optional[str] = None
+    reject_reason: Optional[str] = None
+    fade_reason: Optional[str] = None
+
+# Fixed snapshot schema, in Snapshot field order
+SNAPSHOT_COLUMNS = Snapshot._fields
+
+class ColumnStore:
+    """
+    Column store for snapshots, preallocated to a known upper bound
+    
+    Rows are written into place by index rather than appended, and the
+    unused tail is trimmed off once generation finishes.
+    """
+    
+    def __init__(self, capacity: int):
+        self.columns = {name: [None] * capacity for name in SNAPSHOT_COLUMNS}
+        self.size = 0
+    
+    def append(self, row: Snapshot):
+        index = self.size
+        for column, value in zip(self.columns.values(), row):
+            column[index] = value
+        self.size = index + 1
+    
+    def trimmed(self) -> Dict[str, List]:
+        for column in self.columns.values():
+            del column[self.size:]
+        return self.columns
+
+class SnapshotStreamWriter:
+    """
+    Stream snapshot rows to CSV and JSON as they are generated
+    
+    Rows are written straight through to the files, so memory stays
+    flat however long the run is. The JSON file is a single array with
+    one object per line.
+    """
+    
+    def __init__(self, output: str):
+        self.csv_path = f'{output}.csv'
+        self.json_path = f'{output}.json'
+        self.csv_file = open(self.csv_path, 'w', newline='')
+        self.json_file = open(self.json_path, 'wb')
+        self.writer = csv.writer(self.csv_file)
+        self.writer.writerow(SNAPSHOT_COLUMNS)
+        self.json_file.write(b'[\n')
+        self.separator = b''
+        self.count = 0
+    
+    def write(self, row: Snapshot):
+        self.writer.writerow(row)
+        self.json_file.write(self.separator + dumps_json(row._asdict()))
+        self.separator = b',\n'
+        self.count += 1
+    
+    def close(self):
+        self.json_file.write(b'\n]\n')
+        self.json_file.close()
+        self.csv_file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def simulate_routes(
+    slice_size: int,
+    num_routes: int,
+    fade_rate: float,
+    partial_rate: float,
+    slippage: Tuple[float, float],
+    market_price: float,
+    rng: random.Random
+) -> List[Tuple[VenueResult, int, float]]:
+    """
+    Simulate routing one slice across venues
+    
+    Pure numeric kernel - only draws outcomes and prices, record
+    construction is left to the caller.
+    
+    Returns:
+        (result, filled_qty, fill_price) for each route taken
+    """
+    routes = []
+    route_size = slice_size // num_routes
+    slice_filled = 0
+    rand = rng.random
+    uniform = rng.uniform
+    
+    for _ in range(num_routes):
+        if slice_filled >= slice_size:
+            break
+        
+        # Determine outcome
+        outcome_rand = rand()
+        
+        if outcome_rand < fade_rate:
+            result = VenueResult.FADE
+            filled_qty = 0
+        elif outcome_rand < fade_rate + partial_rate:
+            result = VenueResult.PARTIAL
+            filled_qty = route_size // 2
+        elif outcome_rand < fade_rate + partial_rate + 0.02:
+            result = VenueResult.NO_CONN if rand() < 0.5 else VenueResult.REJECT
+            filled_qty = 0
+        else:
+            result = VenueResult.FILLED
+            filled_qty = route_size
+        
+        # Price with slippage based on urgency
+        fill_price = market_price + uniform(*slippage) if filled_qty > 0 else 0
+        
+        routes.append((result, filled_qty, fill_price))
+        slice_filled += filled_qty
+    
+    return routes
+
 def generate_final_vwap(
     order_size: int = 1000000,
     avg_slice_size: int = 500,
     detail_level: str = "summary",  # "full", "summary", "client_only"
     fade_rate: float = 0.05,
-    partial_rate: float = 0.10
-) -> List[Dict]:
+    partial_rate: float = 0.10,
+    seed: Optional[int] = None,
+    sink: Optional[Callable[[Snapshot], None]] = None
+) -> Optional[Dict[str, List]]:
     """
     Generate production VWAP data
     
@@ -42,13 +209,24 @@ def generate_final_vwap(
         detail_level: How much detail to capture
         fade_rate: Probability of fade events
         partial_rate: Probability of partial fills
+        seed: Random seed for reproducible runs
+        sink: Receives each Snapshot as it is generated instead of
+            collecting them in memory
+    
+    Returns:
+        Snapshots as columns - field name to list of values, or None
+        when rows were streamed to sink
     """
     
-    snapshots = []
     record_id = 0
     
+    # One generator for the whole run, bound methods kept local for the slice loop
+    rng = random.Random(seed)
+    choices = rng.choices
+    
     # Calculate number of slices
     num_slices = order_size // avg_slice_size
+    hours = 7  # Trading day
     
     print(f"Generating VWAP for {order_size:,} shares")
     print(f"Expected slices: ~{num_slices:,}")
@@ -61,50 +239,66 @@ def generate_final_vwap(
     # Market state
     market_price = 650.00
     
+    # Indexed by urgency level, see URGENCY_LEVELS
+    urgency_params = (
+        UrgencyParams(avg_slice_size // 2, avg_slice_size, (-0.01, 0.01), 2),
+        UrgencyParams(avg_slice_size, avg_slice_size * 2, (0.01, 0.03), 3),
+        UrgencyParams(avg_slice_size * 2, avg_slice_size * 4, (0.02, 0.05), 3),
+    )
+    
+    if sink is None:
+        # Worst case: client, algo and hourly updates, plus each slice and its routes
+        max_routes = max(params.num_routes for params in urgency_params)
+        store = ColumnStore(2 + hours + min(num_slices, 50 * hours) * (1 + max_routes))
+        emit = store.append
+    else:
+        store = None
+        emit = sink
+    
     # 1. CLIENT ORDER (always captured)
-    client_order = {
-        'order_id': 'CLIENT_001',
-        'parent_order_id': None,
-        'client_order_id': 'C20241216_MEGA',
-        'order_level': 0,
-        'order_type': 'CLIENT',
-        'ticker': 'ASML.AS',
-        'side': 'Buy',
-        'quantity': order_size,
-        'filled_quantity': 0,
-        'remaining_quantity': order_size,
-        'average_price': 0.0,
-        'state': 'PENDING',
-        'snapshot_time': current_time.isoformat(),
-        'event_type': 'NEW',
-        'record_id': f'REC_{record_id:08d}'
-    }
-    snapshots.append(client_order.copy())
+    client_order = Snapshot(
+        order_id='CLIENT_001',
+        parent_order_id=None,
+        client_order_id=CLIENT_ORDER_ID,
+        order_level=0,
+        order_type='CLIENT',
+        ticker=TICKER,
+        side=SIDE,
+        quantity=order_size,
+        filled_quantity=0,
+        remaining_quantity=order_size,
+        average_price=0.0,
+        state='PENDING',
+        snapshot_time=current_time.isoformat(),
+        event_type='NEW',
+        record_id=f'REC_{record_id:08d}'
+    )
+    emit(client_order)
     record_id += 1
     
     # 2. ALGO PARENT
     current_time += timedelta(seconds=1)
-    algo_parent = {
-        'order_id': 'ALGO_001',
-        'parent_order_id': 'CLIENT_001',
-        'client_order_id': 'C20241216_MEGA',
-        'order_level': 1,
-        'order_type': 'ALGO_PARENT',
-        'ticker': 'ASML.AS',
-        'side': 'Buy',
-        'quantity': order_size,
-        'filled_quantity': 0,
-        'remaining_quantity': order_size,
-        'average_price': 0.0,
-        'state': 'WORKING',
-        'algo_strategy': 'VWAP',
-        'snapshot_time': current_time.isoformat(),
-        'event_type': 'NEW',
-        'record_id': f'REC_{record_id:08d}'
-    }
+    algo_parent = Snapshot(
+        order_id='ALGO_001',
+        parent_order_id='CLIENT_001',
+        client_order_id=CLIENT_ORDER_ID,
+        order_level=1,
+        order_type='ALGO_PARENT',
+        ticker=TICKER,
+        side=SIDE,
+        quantity=order_size,
+        filled_quantity=0,
+        remaining_quantity=order_size,
+        average_price=0.0,
+        state='WORKING',
+        algo_strategy='VWAP',
+        snapshot_time=current_time.isoformat(),
+        event_type='NEW',
+        record_id=f'REC_{record_id:08d}'
+    )
     
     if detail_level != "client_only":
-        snapshots.append(algo_parent.copy())
+        emit(algo_parent)
         record_id += 1
     
     # 3. GENERATE SLICES
@@ -123,7 +317,6 @@ def generate_final_vwap(
     }
     
     # Process in hourly batches to simulate VWAP schedule
-    hours = 7  # Trading day
     slices_per_hour = num_slices // hours
     
     for hour in range(hours):
@@ -133,53 +326,54 @@ def generate_final_vwap(
         # Determine urgency based on participation
         expected = (order_size // hours) * (hour + 1)
         if total_filled < expected * 0.7:
-            urgency = Urgency.CRITICAL
+            urgency_level = 2
         elif total_filled < expected * 0.9:
-            urgency = Urgency.URGENT
+            urgency_level = 1
         else:
-            urgency = Urgency.NORMAL
+            urgency_level = 0
+        
+        urgency = URGENCY_VALUES[urgency_level]
+        slice_min, slice_max, slippage, num_routes = urgency_params[urgency_level]
         
         # Generate slices for this hour
         hour_slices = slices_per_hour if hour < hours - 1 else (num_slices - slice_counter + 1)
+        hour_slices = min(hour_slices, 50)  # Cap at 50 slices per hour for file size
+        
+        # Urgency is fixed for the hour, so draw slice sizes and spacing in bulk
+        slice_sizes = choices(range(slice_min, slice_max + 1), k=hour_slices)
+        slice_gaps = choices(range(30, 121), k=hour_slices)
         
-        for _ in range(min(hour_slices, 50)):  # Cap at 50 slices per hour for file size
+        for slice_size, slice_gap in zip(slice_sizes, slice_gaps):
             if total_filled >= order_size:
                 break
                 
-            current_time += timedelta(seconds=random.randint(30, 120))
+            current_time += timedelta(seconds=slice_gap)
             
             # Vary slice size based on urgency
-            if urgency == Urgency.CRITICAL:
-                slice_size = random.randint(avg_slice_size * 2, avg_slice_size * 4)
-            elif urgency == Urgency.URGENT:
-                slice_size = random.randint(avg_slice_size, avg_slice_size * 2)
-            else:
-                slice_size = random.randint(avg_slice_size // 2, avg_slice_size)
-            
             slice_size = min(slice_size, order_size - total_filled)
             
             # Create slice
-            slice_order = {
-                'order_id': f'SLICE_{slice_counter:05d}',
-                'parent_order_id': 'ALGO_001',
-                'client_order_id': 'C20241216_MEGA',
-                'order_level': 2,
-                'order_type': 'ALGO_SLICE',
-                'ticker': 'ASML.AS',
-                'side': 'Buy',
-                'quantity': slice_size,
-                'filled_quantity': 0,
-                'remaining_quantity': slice_size,
-                'average_price': 0.0,
-                'state': 'PENDING',
-                'urgency': urgency.value,
-                'snapshot_time': current_time.isoformat(),
-                'event_type': 'NEW',
-                'record_id': f'REC_{record_id:08d}'
-            }
+            slice_order = Snapshot(
+                order_id=f'SLICE_{slice_counter:05d}',
+                parent_order_id='ALGO_001',
+                client_order_id=CLIENT_ORDER_ID,
+                order_level=2,
+                order_type='ALGO_SLICE',
+                ticker=TICKER,
+                side=SIDE,
+                quantity=slice_size,
+                filled_quantity=0,
+                remaining_quantity=slice_size,
+                average_price=0.0,
+                state='PENDING',
+                urgency=urgency,
+                snapshot_time=current_time.isoformat(),
+                event_type='NEW',
+                record_id=f'REC_{record_id:08d}'
+            )
             
             if detail_level == "full":
-                snapshots.append(slice_order.copy())
+                emit(slice_order)
                 record_id += 1
             
             stats['total_slices'] += 1
@@ -189,80 +383,42 @@ def generate_final_vwap(
             slice_filled = 0
             slice_value = 0.0
             
-            # Number of SOR routes based on urgency
-            num_routes = 3 if urgency in [Urgency.CRITICAL, Urgency.URGENT] else 2
+            route_size = slice_size // num_routes
+            routes = simulate_routes(slice_size, num_routes, fade_rate, partial_rate,
+                                     slippage, market_price, rng)
             
-            for route_num in range(num_routes):
-                if slice_filled >= slice_size:
-                    break
-                    
-                venue = ['NYSE', 'NASDAQ', 'ARCA', 'BATS', 'DARK'][route_num % 5]
-                route_size = slice_size // num_routes
-                
-                # Determine outcome
-                outcome_rand = random.random()
+            for route_num, (result, filled_qty, fill_price) in enumerate(routes):
+                venue = VENUE_NAMES[route_num % 5]
                 
-                if outcome_rand < fade_rate:
-                    # FADE
-                    result = VenueResult.FADE
-                    filled_qty = 0
+                if result == VenueResult.FADE:
                     stats['fade_count'] += 1
-                    
-                elif outcome_rand < fade_rate + partial_rate:
-                    # PARTIAL
-                    result = VenueResult.PARTIAL
-                    filled_qty = route_size // 2
+                elif result == VenueResult.PARTIAL:
                     stats['partial_count'] += 1
-                    
-                elif outcome_rand < fade_rate + partial_rate + 0.02:
-                    # REJECT/NO_CONN
-                    result = VenueResult.NO_CONN if random.random() < 0.5 else VenueResult.REJECT
-                    filled_qty = 0
+                elif result != VenueResult.FILLED:
                     stats['reject_count'] += 1
-                    
-                else:
-                    # FILLED
-                    result = VenueResult.FILLED
-                    filled_qty = route_size
-                
-                # Price with slippage based on urgency
-                if filled_qty > 0:
-                    if urgency == Urgency.CRITICAL:
-                        fill_price = market_price + random.uniform(0.02, 0.05)
-                    elif urgency == Urgency.URGENT:
-                        fill_price = market_price + random.uniform(0.01, 0.03)
-                    else:
-                        fill_price = market_price + random.uniform(-0.01, 0.01)
-                else:
-                    fill_price = 0
                 
                 # Create SOR route (only in full detail mode)
                 if detail_level == "full":
-                    sor_order = {
-                        'order_id': f'SOR_{sor_counter:06d}',
-                        'parent_order_id': slice_order['order_id'],
-                        'client_order_id': 'C20241216_MEGA',
-                        'order_level': 3,
-                        'order_type': 'ROUTE',
-                        'ticker': 'ASML.AS',
-                        'side': 'Buy',
-                        'quantity': route_size,
-                        'filled_quantity': filled_qty,
-                        'remaining_quantity': route_size - filled_qty,
-                        'average_price': fill_price,
-                        'state': result.value,
-                        'venue': venue,
-                        'snapshot_time': (current_time + timedelta(milliseconds=route_num * 50)).isoformat(),
-                        'event_type': f'VENUE_{result.value}',
-                        'record_id': f'REC_{record_id:08d}'
-                    }
-                    
-                    if result == VenueResult.NO_CONN:
-                        sor_order['reject_reason'] = f'No connection to {venue}-FIX-01'
-                    elif result == VenueResult.FADE:
-                        sor_order['fade_reason'] = 'Liquidity exhausted'
-                    
-                    snapshots.append(sor_order)
+                    emit(Snapshot(
+                        order_id=f'SOR_{sor_counter:06d}',
+                        parent_order_id=slice_order.order_id,
+                        client_order_id=CLIENT_ORDER_ID,
+                        order_level=3,
+                        order_type='ROUTE',
+                        ticker=TICKER,
+                        side=SIDE,
+                        quantity=route_size,
+                        filled_quantity=filled_qty,
+                        remaining_quantity=route_size - filled_qty,
+                        average_price=fill_price,
+                        state=VENUE_STATES[result],
+                        venue=venue,
+                        snapshot_time=(current_time + timedelta(milliseconds=route_num * 50)).isoformat(),
+                        event_type=VENUE_EVENT_TYPES[result],
+                        record_id=f'REC_{record_id:08d}',
+                        reject_reason=NO_CONNECTION_REASONS[venue] if result == VenueResult.NO_CONN else None,
+                        fade_reason='Liquidity exhausted' if result == VenueResult.FADE else None
+                    ))
                     record_id += 1
                 
                 stats['total_routes'] += 1
@@ -277,26 +433,30 @@ def generate_final_vwap(
             
             # Update slice completion (in summary mode)
             if detail_level == "summary" and slice_filled > 0:
-                slice_order['filled_quantity'] = slice_filled
-                slice_order['remaining_quantity'] = slice_size - slice_filled
-                slice_order['average_price'] = slice_value / slice_filled if slice_filled > 0 else 0
-                slice_order['state'] = 'FILLED' if slice_filled >= slice_size else 'PARTIAL'
-                slice_order['event_type'] = 'SLICE_SUMMARY'
-                snapshots.append(slice_order.copy())
+                emit(slice_order._replace(
+                    filled_quantity=slice_filled,
+                    remaining_quantity=slice_size - slice_filled,
+                    average_price=slice_value / slice_filled if slice_filled > 0 else 0,
+                    state='FILLED' if slice_filled >= slice_size else 'PARTIAL',
+                    event_type='SLICE_SUMMARY',
+                    record_id=f'REC_{record_id:08d}'
+                ))
                 record_id += 1
         
         # Hourly update to client
         current_time += timedelta(seconds=1)
-        client_order['filled_quantity'] = total_filled
-        client_order['remaining_quantity'] = order_size - total_filled
-        client_order['average_price'] = total_value / total_filled if total_filled > 0 else 0
-        client_order['state'] = 'WORKING' if total_filled < order_size else 'FILLED'
-        client_order['snapshot_time'] = current_time.isoformat()
-        client_order['event_type'] = 'CLIENT_UPDATE'
-        client_order['record_id'] = f'REC_{record_id:08d}'
-        client_order['hour'] = hour + 1
-        client_order['urgency'] = urgency.value
-        snapshots.append(client_order.copy())
+        client_order = client_order._replace(
+            filled_quantity=total_filled,
+            remaining_quantity=order_size - total_filled,
+            average_price=total_value / total_filled if total_filled > 0 else 0,
+            state='WORKING' if total_filled < order_size else 'FILLED',
+            snapshot_time=current_time.isoformat(),
+            event_type='CLIENT_UPDATE',
+            record_id=f'REC_{record_id:08d}',
+            hour=hour + 1,
+            urgency=urgency
+        )
+        emit(client_order)
         record_id += 1
     
     # Final summary
@@ -309,9 +469,9 @@ def generate_final_vwap(
     print(f"  Fades: {stats['fade_count']}")
     print(f"  Partials: {stats['partial_count']}")
     print(f"  Rejects: {stats['reject_count']}")
-    print(f"  Snapshots: {len(snapshots):,}")
+    print(f"  Snapshots: {record_id:,}")
     
-    return snapshots
+    return store.trimmed() if store is not None else None
 
 def main():
     parser = argparse.ArgumentParser(description='Generate production VWAP data')
@@ -320,38 +480,47 @@ def main():
     parser.add_argument('--detail', choices=['full', 'summary', 'client_only'], 
                        default='summary', help='Level of detail')
     parser.add_argument('--output', default='final_vwap', help='Output filename base')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible output')
+    parser.add_argument('--parquet', action='store_true',
+                       help='Write Parquet instead of CSV/JSON (requires pyarrow)')
     
     args = parser.parse_args()
     
-    # Generate data
-    snapshots = generate_final_vwap(
+    if args.parquet:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            parser.error('--parquet requires pyarrow (pip install pyarrow)')
+    
+    params = dict(
         order_size=args.size,
         avg_slice_size=args.slice_size,
-        detail_level=args.detail
+        detail_level=args.detail,
+        seed=args.seed
     )
     
-    # Export
-    with open(f'{args.output}.json', 'w') as f:
-        json.dump(snapshots, f, indent=2, default=str)
-    
-    if snapshots:
-        keys = set()
-        for s in snapshots:
-            keys.update(s.keys())
-        
-        with open(f'{args.output}.csv', 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=sorted(keys))
-            writer.writeheader()
-            writer.writerows(snapshots)
-    
-    print(f"\n✅ Saved to {args.output}.csv and {args.output}.json")
+    if args.parquet:
+        # Arrow wants whole columns, so collect them and hand them over in one go
+        snapshots = generate_final_vwap(**params)
+        num_rows = len(snapshots['record_id'])
+        output_path = f'{args.output}.parquet'
+        pq.write_table(pa.Table.from_pydict(snapshots), output_path,
+                       compression='zstd', use_dictionary=True)
+        print(f"\n✅ Saved to {output_path}")
+    else:
+        # Text formats are streamed row by row as the simulation runs
+        with SnapshotStreamWriter(args.output) as stream:
+            generate_final_vwap(**params, sink=stream.write)
+        num_rows = stream.count
+        output_path = stream.csv_path
+        print(f"\n✅ Saved to {stream.csv_path} and {stream.json_path}")
     
     # File size check
-    import os
-    csv_size = os.path.getsize(f'{args.output}.csv') / (1024 * 1024)
-    print(f"📁 CSV size: {csv_size:.2f} MB")
+    file_size = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"📁 {'Parquet' if args.parquet else 'CSV'} size: {file_size:.2f} MB")
     
-    if len(snapshots) > 100000:
+    if num_rows > 100000:
         print("⚠️  Warning: Over 100k rows. Consider using --detail summary or --slice-size larger")
 
 if __name__ == "__main__":
@@ -5,14 +5,16 @@ Generates both instrument reference data and VWAP execution data
 This is the final, production-ready version.
 """
 
-import json
 import csv
 import random
 import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from itertools import accumulate
+from typing import List, Dict, Iterator, Optional, Tuple
 from enum import Enum
 
+from json_io import write_json
+
 # ============================================================================
 # INSTRUMENT GENERATOR
 # ============================================================================
@@ -77,12 +79,64 @@ class VenueResult(Enum):
     REJECT = "REJECT"
     NO_CONN = "NO_CONNECTION"
 
+# Fill price range around the market by urgency - aggressive slices pay up
+FILL_PRICE_RANGE = {
+    Urgency.CRITICAL: (0.02, 0.04),
+    Urgency.URGENT: (0.01, 0.02),
+    Urgency.NORMAL: (-0.01, 0.01),
+    Urgency.PASSIVE: (-0.01, 0.01),
+}
+PARTIAL_PRICE_RANGE = (-0.01, 0.02)
+
+# Fixed snapshot schema - the union of every order type's fields,
+# anything an order does not carry is left as None
+SNAPSHOT_COLUMNS = (
+    'order_id', 'parent_order_id', 'client_order_id', 'order_level', 'order_type',
+    'ticker', 'side', 'quantity', 'filled_quantity', 'remaining_quantity',
+    'average_price', 'state', 'client_name', 'algo_strategy', 'participation_pct',
+    'urgency', 'venue', 'reject_reason', 'fade_reason',
+    'market_price', 'snapshot_time', 'event_type', 'record_id'
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(SNAPSHOT_COLUMNS)}
+MARKET_PRICE_INDEX = COLUMN_INDEX['market_price']
+SNAPSHOT_TIME_INDEX = COLUMN_INDEX['snapshot_time']
+EVENT_TYPE_INDEX = COLUMN_INDEX['event_type']
+RECORD_ID_INDEX = COLUMN_INDEX['record_id']
+
+class SnapshotBuffer:
+    """
+    Column store for snapshots - one list per field in SNAPSHOT_COLUMNS
+    
+    Rows arrive already laid out in SNAPSHOT_COLUMNS order, so taking
+    a snapshot never copies the order dict.
+    """
+    
+    def __init__(self):
+        self.columns = {name: [] for name in SNAPSHOT_COLUMNS}
+    
+    def __len__(self) -> int:
+        return len(self.columns['record_id'])
+    
+    def append_row(self, row: List):
+        """Append a row laid out in SNAPSHOT_COLUMNS order"""
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+    
+    def rows(self) -> Iterator[Tuple]:
+        return zip(*self.columns.values())
+    
+    def to_dicts(self) -> List[Dict]:
+        return [dict(zip(self.columns, row)) for row in self.rows()]
+
 class ProductionVWAPGenerator:
-    def __init__(self, order_size: int, avg_slice_size: int, detail_level: str):
+    def __init__(self, order_size: int, avg_slice_size: int, detail_level: str,
+                 seed: Optional[int] = None):
         self.order_size = order_size
         self.avg_slice_size = avg_slice_size
         self.detail_level = detail_level
-        self.snapshots = []
+        self.rng = random.Random(seed)
+        self.expected_per_hour = order_size // 7  # even participation over 7 hours
+        self.snapshots = SnapshotBuffer()
         self.record_id = 0
         
         # Tracking cumulative fills
@@ -107,12 +161,12 @@ class ProductionVWAPGenerator:
         
     def add_snapshot(self, order: Dict, event_type: str, timestamp: datetime):
         """Add a snapshot to the tick database"""
-        snapshot = order.copy()
-        snapshot['snapshot_time'] = timestamp.isoformat()
-        snapshot['event_type'] = event_type
-        snapshot['record_id'] = f'REC_{self.record_id:08d}'
-        snapshot['market_price'] = self.market_price
-        self.snapshots.append(snapshot)
+        row = list(map(order.get, SNAPSHOT_COLUMNS))
+        row[SNAPSHOT_TIME_INDEX] = timestamp.isoformat()
+        row[EVENT_TYPE_INDEX] = event_type
+        row[RECORD_ID_INDEX] = f'REC_{self.record_id:08d}'
+        row[MARKET_PRICE_INDEX] = self.market_price
+        self.snapshots.append_row(row)
         self.record_id += 1
         
     def propagate_fill_up_chain(self, slice_filled: int, slice_value: float, 
@@ -145,8 +199,8 @@ class ProductionVWAPGenerator:
         self.algo_parent['urgency'] = urgency.value
         
         # Calculate participation
-        hour = (datetime.fromisoformat(timestamp.isoformat()).hour - 9)
-        expected = (self.order_size // 7) * (hour + 1) if hour < 7 else self.order_size
+        hour = timestamp.hour - 9
+        expected = self.expected_per_hour * (hour + 1) if hour < 7 else self.order_size
         participation_pct = (self.total_filled / expected * 100) if expected > 0 else 100
         self.algo_parent['participation_pct'] = round(participation_pct, 1)
         
@@ -161,7 +215,7 @@ class ProductionVWAPGenerator:
         
         self.add_snapshot(self.client_order, 'CLIENT_UPDATE', timestamp)
         
-    def generate(self) -> List[Dict]:
+    def generate(self) -> SnapshotBuffer:
         """Generate complete VWAP execution with proper propagation"""
         
         print(f"Generating VWAP for {self.order_size:,} shares")
@@ -242,6 +296,27 @@ class ProductionVWAPGenerator:
             
             # Generate slices for this hour (cap for file size)
             hour_slices = min(slices_per_hour, 50)
+            num_routes = 3 if urgency in [Urgency.CRITICAL, Urgency.URGENT] else 2
+            
+            # Slice size range based on urgency
+            if urgency == Urgency.CRITICAL:
+                size_range = (self.avg_slice_size * 2, self.avg_slice_size * 4)
+            elif urgency == Urgency.URGENT:
+                size_range = (self.avg_slice_size, self.avg_slice_size * 2)
+            else:
+                size_range = (self.avg_slice_size // 2, self.avg_slice_size)
+            
+            # Draw the whole hour's randomness in batches: slice sizes, timing
+            # jitter, the market's walk and a (outcome, price) roll per route
+            rand, randint, uniform = self.rng.random, self.rng.randint, self.rng.uniform
+            slice_sizes = [randint(*size_range) for _ in range(hour_slices)]
+            jitter_seconds = [randint(0, 30) for _ in range(hour_slices)]
+            price_steps = [uniform(-0.1, 0.1) for _ in range(hour_slices)]
+            price_path = list(accumulate(price_steps, initial=self.market_price))[1:]
+            outcome_rolls = [rand() for _ in range(hour_slices * num_routes)]
+            price_rolls = [rand() for _ in range(hour_slices * num_routes)]
+            fill_low, fill_high = FILL_PRICE_RANGE[urgency]
+            partial_low, partial_high = PARTIAL_PRICE_RANGE
             
             for slice_in_hour in range(hour_slices):
                 if self.total_filled >= self.order_size:
@@ -251,21 +326,13 @@ class ProductionVWAPGenerator:
                 current_time = base_time + timedelta(
                     hours=hour,
                     minutes=(60 // hour_slices) * slice_in_hour,
-                    seconds=random.randint(0, 30)
+                    seconds=jitter_seconds[slice_in_hour]
                 )
                 
                 # Market moves
-                self.market_price += random.uniform(-0.1, 0.1)
+                self.market_price = price_path[slice_in_hour]
                 
-                # Slice size based on urgency
-                if urgency == Urgency.CRITICAL:
-                    slice_size = random.randint(self.avg_slice_size * 2, self.avg_slice_size * 4)
-                elif urgency == Urgency.URGENT:
-                    slice_size = random.randint(self.avg_slice_size, self.avg_slice_size * 2)
-                else:
-                    slice_size = random.randint(self.avg_slice_size // 2, self.avg_slice_size)
-                    
-                slice_size = min(slice_size, self.order_size - self.total_filled)
+                slice_size = min(slice_sizes[slice_in_hour], self.order_size - self.total_filled)
                 
                 # Create slice
                 slice_order = {
@@ -293,7 +360,6 @@ class ProductionVWAPGenerator:
                 # Route to venues
                 slice_filled = 0
                 slice_value = 0.0
-                num_routes = 3 if urgency in [Urgency.CRITICAL, Urgency.URGENT] else 2
                 
                 for route_num in range(num_routes):
                     if slice_filled >= slice_size:
@@ -310,7 +376,9 @@ class ProductionVWAPGenerator:
                     route_time = current_time + timedelta(milliseconds=10 + route_num * 50)
                     
                     # Determine outcome
-                    outcome_rand = random.random()
+                    roll = slice_in_hour * num_routes + route_num
+                    outcome_rand = outcome_rolls[roll]
+                    price_rand = price_rolls[roll]
                     
                     if outcome_rand < 0.05:  # 5% fade
                         result = VenueResult.FADE
@@ -321,11 +389,11 @@ class ProductionVWAPGenerator:
                     elif outcome_rand < 0.15:  # 10% partial
                         result = VenueResult.PARTIAL
                         filled_qty = route_size // 2
-                        fill_price = self.market_price + random.uniform(-0.01, 0.02)
+                        fill_price = self.market_price + partial_low + (partial_high - partial_low) * price_rand
                         self.stats['partial_count'] += 1
                         
-                    elif outcome_rand < 0.17:  # 2% reject
-                        result = VenueResult.REJECT if random.random() < 0.5 else VenueResult.NO_CONN
+                    elif outcome_rand < 0.17:  # 2% reject - half are lost connections
+                        result = VenueResult.REJECT if outcome_rand < 0.16 else VenueResult.NO_CONN
                         filled_qty = 0
                         fill_price = 0
                         self.stats['reject_count'] += 1
@@ -334,12 +402,7 @@ class ProductionVWAPGenerator:
                         result = VenueResult.FILLED
                         filled_qty = route_size
                         # Price based on urgency
-                        if urgency == Urgency.CRITICAL:
-                            fill_price = self.market_price + random.uniform(0.02, 0.04)
-                        elif urgency == Urgency.URGENT:
-                            fill_price = self.market_price + random.uniform(0.01, 0.02)
-                        else:
-                            fill_price = self.market_price + random.uniform(-0.01, 0.01)
+                        fill_price = self.market_price + fill_low + (fill_high - fill_low) * price_rand
                     
                     # Create SOR route
                     if self.detail_level == 'full':
@@ -420,6 +483,7 @@ def main():
                        help='Only generate instruments file')
     parser.add_argument('--vwap-only', action='store_true',
                        help='Only generate VWAP data')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible VWAP data')
     
     args = parser.parse_args()
     
@@ -433,8 +497,7 @@ def main():
             writer.writeheader()
             writer.writerows(instruments)
         
-        with open('instruments.json', 'w') as f:
-            json.dump(instruments, f, indent=2, default=str)
+        write_json('instruments.json', instruments)
         
         print(f"✅ Saved {len(instruments)} instruments to instruments.csv and instruments.json")
     
@@ -444,24 +507,20 @@ def main():
         generator = ProductionVWAPGenerator(
             order_size=args.size,
             avg_slice_size=args.slice_size,
-            detail_level=args.detail
+            detail_level=args.detail,
+            seed=args.seed
         )
         
         snapshots = generator.generate()
         
         # Export
-        with open('production_vwap_final.json', 'w') as f:
-            json.dump(snapshots, f, indent=2, default=str)
+        write_json('production_vwap_final.json', snapshots.to_dicts())
         
-        if snapshots:
-            keys = set()
-            for s in snapshots:
-                keys.update(s.keys())
-            
-            with open('production_vwap_final.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=sorted(keys))
-                writer.writeheader()
-                writer.writerows(snapshots)
+        # CSV straight from the columns - the schema is fixed, so no key scan
+        with open('production_vwap_final.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(SNAPSHOT_COLUMNS)
+            writer.writerows(snapshots.rows())
         
         print(f"\n✅ Saved to production_vwap_final.csv and production_vwap_final.json")
         
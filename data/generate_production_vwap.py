@@ -5,26 +5,181 @@ Includes: Participation monitoring, urgency-based aggression, fade/retry, slippa
 This is what real algo engines do
 """
 
-import json
 import csv
 import random
+import argparse
+from multiprocessing import Pool
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
-from enum import Enum
+from itertools import accumulate
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Tuple
+from enum import IntEnum
 
-class Urgency(Enum):
-    """Algo urgency levels based on participation"""
-    PASSIVE = "PASSIVE"      # Ahead of schedule
-    NORMAL = "NORMAL"        # On track
-    URGENT = "URGENT"        # Behind schedule
-    CRITICAL = "CRITICAL"    # Way behind - must catch up
+from json_io import dumps_json
 
-class OrderInstruction(Enum):
-    """SOR instructions based on urgency"""
-    POST_ONLY = "POST_ONLY"           # Passive - provide liquidity
-    LIMIT_IOC = "LIMIT_IOC"           # Normal - take at limit
-    MARKET_IOC = "MARKET_IOC"         # Urgent - take liquidity
-    SWEEP = "SWEEP"                   # Critical - take all venues
+class Urgency(IntEnum):
+    """Algo urgency levels based on participation, ordered by severity"""
+    PASSIVE = 0      # Ahead of schedule
+    NORMAL = 1       # On track
+    URGENT = 2       # Behind schedule
+    CRITICAL = 3     # Way behind - must catch up
+
+class OrderInstruction(IntEnum):
+    """SOR instructions based on urgency, ordered by aggression"""
+    POST_ONLY = 0     # Passive - provide liquidity
+    LIMIT_IOC = 1     # Normal - take at limit
+    MARKET_IOC = 2    # Urgent - take liquidity
+    SWEEP = 3         # Critical - take all venues
+
+# Labels written to snapshots, indexed by the enum values above
+URGENCY_LABELS = tuple(urgency.name for urgency in Urgency)
+INSTRUCTION_LABELS = tuple(instruction.name for instruction in OrderInstruction)
+
+# Fixed latencies between lifecycle events
+ALGO_ACK_DELAY = timedelta(milliseconds=10)
+SOR_ROUTE_DELAY = timedelta(milliseconds=50)
+VENUE_FADE_DELAY = timedelta(milliseconds=20)
+VENUE_ACK_DELAY = timedelta(milliseconds=30)
+
+# Venues routed to for each instruction
+VENUES_BY_INSTR: Dict[OrderInstruction, Tuple[str, ...]] = {
+    OrderInstruction.SWEEP: ('NYSE', 'NASDAQ', 'ARCA', 'BATS', 'DARK'),  # Hit all
+    OrderInstruction.MARKET_IOC: ('NYSE', 'NASDAQ', 'ARCA'),  # Major venues
+    OrderInstruction.LIMIT_IOC: ('DARK', 'NYSE'),  # Dark first
+    OrderInstruction.POST_ONLY: ('ARCA',),  # Single venue passive
+}
+
+# Slicing plan per urgency, indexed by Urgency:
+# (slice size from (hour_target, shortfall, remaining), instruction, slices per hour)
+SLICE_PLAN = (
+    # PASSIVE - small slices, post liquidity
+    (lambda hour_target, shortfall, remaining: hour_target // 6, OrderInstruction.POST_ONLY, 6),
+    # NORMAL - normal slicing
+    (lambda hour_target, shortfall, remaining: hour_target // 4, OrderInstruction.LIMIT_IOC, 4),
+    # URGENT - medium slices more frequently
+    (lambda hour_target, shortfall, remaining: min(hour_target // 2, remaining), OrderInstruction.MARKET_IOC, 3),
+    # CRITICAL - large aggressive slices
+    (lambda hour_target, shortfall, remaining: min(shortfall, remaining), OrderInstruction.SWEEP, 1),
+)
+
+# Fixed snapshot schema - fields an order does not carry are left as None
+SNAPSHOT_COLUMNS = (
+    'order_id', 'parent_order_id', 'client_order_id', 'order_level', 'order_type',
+    'ticker', 'side', 'quantity', 'filled_quantity', 'remaining_quantity',
+    'average_price', 'state', 'client_name', 'algo_strategy', 'participation_target',
+    'urgency', 'instruction', 'venue', 'participation_shortfall', 'fade_reason',
+    'market_price', 'snapshot_time', 'event_type', 'record_id'
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(SNAPSHOT_COLUMNS)}
+URGENCY_INDEX = COLUMN_INDEX['urgency']
+MARKET_PRICE_INDEX = COLUMN_INDEX['market_price']
+SNAPSHOT_TIME_INDEX = COLUMN_INDEX['snapshot_time']
+EVENT_TYPE_INDEX = COLUMN_INDEX['event_type']
+RECORD_ID_INDEX = COLUMN_INDEX['record_id']
+
+def format_row(row: Tuple) -> Tuple:
+    """Render a snapshot row for export - record ids are kept as ints until now"""
+    return (*row[:RECORD_ID_INDEX], f"REC_{row[RECORD_ID_INDEX]:08d}", *row[RECORD_ID_INDEX + 1:])
+
+class SnapshotBuffer:
+    """
+    Column store for snapshots - one list per field in SNAPSHOT_COLUMNS
+    
+    Rows arrive already laid out in SNAPSHOT_COLUMNS order, so taking
+    a snapshot never copies the order dict.
+    """
+    
+    def __init__(self):
+        self.columns = {name: [] for name in SNAPSHOT_COLUMNS}
+    
+    def __len__(self) -> int:
+        return len(self.columns['record_id'])
+    
+    def append_row(self, row: List):
+        """Append a row already laid out in SNAPSHOT_COLUMNS order"""
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+    
+    def extend(self, other: 'SnapshotBuffer'):
+        """Append all snapshots from another buffer, renumbering its record ids to follow on"""
+        offset = len(self)
+        for name, column in self.columns.items():
+            if name == 'record_id':
+                column.extend(offset + record_id for record_id in other.columns[name])
+            else:
+                column.extend(other.columns[name])
+    
+    def rows(self) -> Iterator[Tuple]:
+        """Raw rows, with integer record ids"""
+        return zip(*self.columns.values())
+    
+    def to_dicts(self) -> List[Dict]:
+        return [dict(zip(self.columns, format_row(row))) for row in self.rows()]
+    
+    def export_columns(self) -> Dict[str, List]:
+        """Columns ready for export, with record ids rendered like format_row"""
+        columns = dict(self.columns)
+        columns['record_id'] = [f"REC_{record_id:08d}" for record_id in columns['record_id']]
+        return columns
+    
+    @property
+    def urgency_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for urgency in self.columns['urgency']:
+            if urgency is not None:
+                counts[urgency] = counts.get(urgency, 0) + 1
+        return counts
+
+class SnapshotStreamWriter:
+    """
+    Write snapshots straight to CSV and JSON as they are taken
+    
+    Drop-in for SnapshotBuffer when the rows only need to reach disk:
+    nothing is kept apart from the row count and urgency tallies. The
+    JSON file is a single array with one object per line.
+    """
+    
+    def __init__(self, output: str):
+        self.csv_path = f'{output}.csv'
+        self.json_path = f'{output}.json'
+        self.csv_file = open(self.csv_path, 'w', newline='')
+        self.json_file = open(self.json_path, 'wb')
+        self.writer = csv.writer(self.csv_file)
+        self.writer.writerow(SNAPSHOT_COLUMNS)
+        self.json_file.write(b'[\n')
+        self.separator = b''
+        self.count = 0
+        self.urgency_counts: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def extend(self, other: SnapshotBuffer):
+        """Write all snapshots from a buffer, renumbering its record ids to follow on"""
+        offset = self.count
+        for row in other.rows():
+            self.append_row((*row[:RECORD_ID_INDEX], offset + row[RECORD_ID_INDEX], *row[RECORD_ID_INDEX + 1:]))
+    
+    def append_row(self, row: Tuple):
+        """Write a row laid out in SNAPSHOT_COLUMNS order"""
+        row = format_row(row)
+        self.writer.writerow(row)
+        self.json_file.write(self.separator + dumps_json(dict(zip(SNAPSHOT_COLUMNS, row))))
+        self.separator = b',\n'
+        self.count += 1
+        urgency = row[URGENCY_INDEX]
+        if urgency is not None:
+            self.urgency_counts[urgency] = self.urgency_counts.get(urgency, 0) + 1
+    
+    def close(self):
+        self.json_file.write(b'\n]\n')
+        self.json_file.close()
+        self.csv_file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
 
 def calculate_vwap_schedule(total_quantity: int, hours: int = 7) -> List[int]:
     """Calculate expected VWAP participation schedule"""
@@ -49,22 +204,108 @@ def calculate_vwap_schedule(total_quantity: int, hours: int = 7) -> List[int]:
     
     return schedule
 
+class SorOutcome(NamedTuple):
+    """One possible result of routing to a venue"""
+    state: str
+    fill_divisor: int  # venue quantity is divided by this, 0 for no fill
+    price_offset: Tuple[float, float]  # fill price range around the market
+    slippage_bps: float
+
+NO_FILL = SorOutcome('PENDING', 0, (0.0, 0.0), 0)
+
+# Venue outcome distribution per instruction: (outcomes, cumulative weights)
+SOR_OUTCOMES: Dict[OrderInstruction, Tuple[Tuple[SorOutcome, ...], Tuple[float, ...]]] = {
+    # Always fills but with slippage
+    OrderInstruction.SWEEP: (
+        (SorOutcome('FILLED', 1, (0.02, 0.05), 5),),
+        (1.0,)
+    ),
+    # Usually fills, some slippage
+    OrderInstruction.MARKET_IOC: (
+        (SorOutcome('FILLED', 1, (0.01, 0.03), 2), SorOutcome('FADE', 0, (0.0, 0.0), 0)),
+        (0.85, 1.0)
+    ),
+    # Sometimes fills, minimal slippage - might be partial
+    OrderInstruction.LIMIT_IOC: (
+        (SorOutcome('PARTIAL', 2, (-0.01, 0.01), 0), SorOutcome('FILLED', 1, (-0.01, 0.01), 0), NO_FILL),
+        (0.7 * 0.3, 0.7, 1.0)
+    ),
+    # Rarely fills immediately, but at a better price
+    OrderInstruction.POST_ONLY: (
+        (SorOutcome('FILLED', 1, (-0.01, -0.01), -1), NO_FILL),  # Negative slippage (good)
+        (0.3, 1.0)
+    ),
+}
+
+def simulate_sor(instruction: OrderInstruction, target_qty: int, n_venues: int,
+                 market_price: float, rng: random.Random) -> List[Tuple[str, int, float, float]]:
+    """
+    Simulate venue outcomes for one slice routed through the SOR
+    
+    Pure numeric kernel - no orders or snapshots are touched here. All
+    venue outcomes are drawn in one go from SOR_OUTCOMES.
+    
+    Returns:
+        (state, filled_qty, fill_price, slippage_bps) for each venue routed to
+    """
+    if target_qty <= 0:
+        return []
+    
+    venue_qty = target_qty // n_venues
+    uniform = rng.uniform
+    outcomes, cum_weights = SOR_OUTCOMES[instruction]
+    
+    results = []
+    for outcome in rng.choices(outcomes, cum_weights=cum_weights, k=n_venues):
+        if outcome.fill_divisor:
+            results.append((outcome.state, venue_qty // outcome.fill_divisor,
+                            market_price + uniform(*outcome.price_offset), outcome.slippage_bps))
+        else:
+            results.append((outcome.state, 0, 0.0, outcome.slippage_bps))
+    
+    return results
+
 class ProductionVWAPSimulator:
-    """Production-quality VWAP algo simulator"""
+    """
+    Production-quality VWAP algo simulator
+    
+    By default each SOR route is captured once, in its terminal
+    VENUE_FILLED/PARTIAL/FADE state. Pass full_trace=True to also record
+    the route's NEW snapshot and the intermediate fade event.
+    """
     
-    def __init__(self, client_order_id: str, quantity: int, ticker: str = "ASML.AS"):
+    def __init__(self, client_order_id: str, quantity: int, ticker: str = "ASML.AS",
+                 seed: Optional[int] = None, verbose: bool = False,
+                 snapshots: Optional[SnapshotStreamWriter] = None, full_trace: bool = False,
+                 trade_date: Optional[datetime] = None, order_number: Optional[int] = None):
         self.client_order_id = client_order_id
+        # Batch runs number their orders so ALGO/SLICE/SOR ids don't clash across simulators
+        self.id_prefix = f'{order_number:03d}_' if order_number else ''
+        self.algo_parent_id = f'ALGO_{self.id_prefix}100001'
         self.quantity = quantity
         self.ticker = ticker
+        self.verbose = verbose  # print progress as the execution runs
+        self.full_trace = full_trace  # record every SOR lifecycle event
         self.schedule = calculate_vwap_schedule(quantity)
-        self.snapshots = []
+        self.cum_schedule = list(accumulate(self.schedule))
+        
+        # All timestamps are offsets from midnight of the trade date (default today)
+        self.epoch = (trade_date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.hour_starts = [self.epoch + timedelta(hours=9 + hour) for hour in range(len(self.schedule))]
+        
+        # Snapshots are collected in memory unless a stream writer is supplied
+        self.snapshots = snapshots if snapshots is not None else SnapshotBuffer()
         self.record_id = 0
         
+        # Per-simulator generator so runs are reproducible and independent
+        self.rng = random.Random(seed)
+        
         # Tracking
         self.total_filled = 0
         self.total_value = 0.0
         self.expected_filled = 0
         self.slippage_bps = 0.0
+        self.last_client_state = None  # (filled, state) last sent to the client
         
         # Market state
         self.market_price = 650.00
@@ -73,25 +314,26 @@ class ProductionVWAPSimulator:
     def add_snapshot(self, order: Dict, event_type: str, timestamp: datetime, 
                     urgency: Urgency = None, metadata: Dict = None):
         """Add snapshot with metadata"""
-        snapshot = order.copy()
-        snapshot['snapshot_time'] = timestamp.isoformat()
-        snapshot['event_type'] = event_type
-        snapshot['record_id'] = f"REC_{self.record_id:08d}"
-        snapshot['market_price'] = self.market_price
-        
-        if urgency:
-            snapshot['urgency'] = urgency.value
-            
+        # Lay the row out directly rather than merging field dicts
+        row = list(map(order.get, SNAPSHOT_COLUMNS))
         if metadata:
-            snapshot.update(metadata)
-            
-        self.snapshots.append(snapshot)
+            for name, value in metadata.items():
+                row[COLUMN_INDEX[name]] = value
+        
+        if urgency is not None:
+            row[URGENCY_INDEX] = URGENCY_LABELS[urgency]
+        row[MARKET_PRICE_INDEX] = self.market_price
+        row[SNAPSHOT_TIME_INDEX] = timestamp.isoformat()
+        row[EVENT_TYPE_INDEX] = event_type
+        row[RECORD_ID_INDEX] = self.record_id
+        
+        self.snapshots.append_row(row)
         self.record_id += 1
         
     def calculate_urgency(self, hour: int, filled: int) -> Tuple[Urgency, float]:
         """Calculate urgency based on participation rate"""
         # Expected fill by this hour
-        expected = sum(self.schedule[:hour+1])
+        expected = self.cum_schedule[hour]
         
         # Participation rate (% behind/ahead)
         if expected > 0:
@@ -113,17 +355,18 @@ class ProductionVWAPSimulator:
         
         return urgency, shortfall
     
-    def generate_execution(self) -> List[Dict]:
+    def generate_execution(self) -> SnapshotBuffer:
         """Generate complete VWAP execution with participation monitoring"""
         
         # Start time
-        current_time = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        current_time = self.hour_starts[0]
         
-        print("PRODUCTION VWAP EXECUTION")
-        print("=" * 80)
-        print(f"Order: {self.quantity:,} shares of {self.ticker}")
-        print(f"Schedule: {self.schedule}")
-        print()
+        if self.verbose:
+            print("PRODUCTION VWAP EXECUTION")
+            print("=" * 80)
+            print(f"Order: {self.quantity:,} shares of {self.ticker}")
+            print(f"Schedule: {self.schedule}")
+            print()
         
         # 1. CLIENT ORDER
         client_order = {
@@ -151,7 +394,7 @@ class ProductionVWAPSimulator:
         
         # 3. ALGO PARENT
         algo_parent = {
-            'order_id': 'ALGO_100001',
+            'order_id': self.algo_parent_id,
             'parent_order_id': client_order['order_id'],
             'client_order_id': self.client_order_id,
             'order_level': 1,
@@ -176,61 +419,46 @@ class ProductionVWAPSimulator:
             if self.total_filled >= self.quantity:
                 break
                 
-            current_time = datetime.now().replace(hour=9+hour, minute=0, second=0, microsecond=0)
+            hour_start = self.hour_starts[hour]
+            current_time = hour_start
             hour_target = self.schedule[hour]
             
             # Calculate urgency
             urgency, shortfall = self.calculate_urgency(hour, self.total_filled)
             
-            print(f"\nHOUR {hour+1} (1{hour+9}:00)")
-            print(f"  Target: {hour_target:,} | Total Target: {sum(self.schedule[:hour+1]):,}")
-            print(f"  Filled: {self.total_filled:,} | Shortfall: {shortfall:,}")
-            print(f"  Urgency: {urgency.value}")
+            if self.verbose:
+                print(f"\nHOUR {hour+1} ({hour_start:%H:%M})\n"
+                      f"  Target: {hour_target:,} | Total Target: {self.cum_schedule[hour]:,}\n"
+                      f"  Filled: {self.total_filled:,} | Shortfall: {shortfall:,}\n"
+                      f"  Urgency: {urgency.name}")
             
             # Determine slice sizes based on urgency
-            if urgency == Urgency.CRITICAL:
-                # Send large aggressive slices
-                slice_size = min(shortfall, self.quantity - self.total_filled)
-                instruction = OrderInstruction.SWEEP
-                num_slices = 1
-            elif urgency == Urgency.URGENT:
-                # Send medium slices more frequently
-                slice_size = min(hour_target // 2, self.quantity - self.total_filled)
-                instruction = OrderInstruction.MARKET_IOC
-                num_slices = 3
-            elif urgency == Urgency.NORMAL:
-                # Normal slicing
-                slice_size = hour_target // 4
-                instruction = OrderInstruction.LIMIT_IOC
-                num_slices = 4
-            else:  # PASSIVE
-                # Small slices, post liquidity
-                slice_size = hour_target // 6
-                instruction = OrderInstruction.POST_ONLY
-                num_slices = 6
+            size_fn, instruction, num_slices = SLICE_PLAN[urgency]
+            slice_size = size_fn(hour_target, shortfall, self.quantity - self.total_filled)
             
             hour_filled = 0
+            slice_step = timedelta(minutes=60 // num_slices)
+            
+            # Market moves - draw the hour's random walk up front
+            price_steps = [self.rng.uniform(-0.2, 0.2) for _ in range(num_slices)]
+            price_path = list(accumulate(price_steps, initial=self.market_price))[1:]
             
             for slice_num in range(num_slices):
                 if self.total_filled >= self.quantity or hour_filled >= hour_target:
                     break
                     
                 # Timing within hour
-                current_time = datetime.now().replace(
-                    hour=9+hour, 
-                    minute=(60//num_slices) * slice_num,
-                    second=0
-                )
+                current_time = hour_start + slice_step * slice_num
                 
                 # Market moves
-                self.market_price += random.uniform(-0.2, 0.2)
+                self.market_price = price_path[slice_num]
                 
                 # Create slice
                 actual_slice_size = min(slice_size, self.quantity - self.total_filled)
                 
                 slice_order = {
-                    'order_id': f'SLICE_{slice_counter}',
-                    'parent_order_id': 'ALGO_100001',
+                    'order_id': f'SLICE_{self.id_prefix}{slice_counter}',
+                    'parent_order_id': self.algo_parent_id,
                     'client_order_id': self.client_order_id,
                     'order_level': 2,
                     'order_type': 'ALGO_SLICE',
@@ -241,8 +469,8 @@ class ProductionVWAPSimulator:
                     'remaining_quantity': actual_slice_size,
                     'average_price': 0.0,
                     'state': 'PENDING',
-                    'urgency': urgency.value,
-                    'instruction': instruction.value
+                    'urgency': URGENCY_LABELS[urgency],
+                    'instruction': INSTRUCTION_LABELS[instruction]
                 }
                 
                 self.add_snapshot(slice_order, 'NEW', current_time, urgency, 
@@ -250,14 +478,15 @@ class ProductionVWAPSimulator:
                 slice_counter += 1
                 
                 # Route to SOR
-                current_time += timedelta(milliseconds=10)
-                slice_filled, slice_value = self.execute_sor(
+                current_time += ALGO_ACK_DELAY
+                slice_filled, slice_value, slice_slippage = self.execute_sor(
                     slice_order, instruction, current_time, sor_counter
                 )
+                self.slippage_bps += slice_slippage
                 sor_counter += 10
                 
                 # Update slice
-                current_time += timedelta(milliseconds=50)
+                current_time += SOR_ROUTE_DELAY
                 slice_order['filled_quantity'] = slice_filled
                 slice_order['remaining_quantity'] = actual_slice_size - slice_filled
                 slice_order['average_price'] = slice_value / slice_filled if slice_filled > 0 else 0
@@ -269,53 +498,52 @@ class ProductionVWAPSimulator:
                 self.total_filled += slice_filled
                 self.total_value += slice_value
                 
-                # Update parent
-                self.update_parent_orders(algo_parent, client_order, current_time, urgency)
+                # Update parent - a slice that filled nothing changes nothing, so
+                # only report it if it closes out the hour's slicing
+                if slice_filled > 0 or slice_num == num_slices - 1:
+                    self.update_parent_orders(algo_parent, client_order, current_time, urgency)
                 
                 # Check if we need to get more aggressive
                 if hour_filled < hour_target * 0.5 and slice_num > num_slices // 2:
-                    print(f"    ⚠️ Behind target - increasing urgency")
-                    urgency = Urgency(min(urgency.value, Urgency.CRITICAL.value))
+                    if self.verbose:
+                        print(f"    ⚠️ Behind target - increasing urgency")
+                    urgency = Urgency(min(urgency + 1, Urgency.CRITICAL))
             
-            print(f"  Hour Result: Filled {hour_filled:,}/{hour_target:,}")
+            if self.verbose:
+                print(f"  Hour Result: Filled {hour_filled:,}/{hour_target:,}")
         
         # Final status
-        print(f"\n{'='*80}")
-        print(f"FINAL RESULT:")
-        print(f"  Filled: {self.total_filled:,}/{self.quantity:,} ({self.total_filled/self.quantity*100:.1f}%)")
-        print(f"  VWAP: {self.total_value/self.total_filled if self.total_filled > 0 else 0:.2f}")
-        print(f"  Slippage: {self.slippage_bps:.1f} bps")
+        if self.verbose:
+            print(f"\n{'='*80}")
+            print(f"FINAL RESULT:")
+            print(f"  Filled: {self.total_filled:,}/{self.quantity:,} ({self.total_filled/self.quantity*100:.1f}%)")
+            print(f"  VWAP: {self.total_value/self.total_filled if self.total_filled > 0 else 0:.2f}")
+            print(f"  Slippage: {self.slippage_bps:.1f} bps")
         
         return self.snapshots
     
     def execute_sor(self, slice_order: Dict, instruction: OrderInstruction, 
-                    timestamp: datetime, sor_counter: int) -> Tuple[int, float]:
-        """Execute slice through SOR with realistic outcomes"""
+                    timestamp: datetime, sor_counter: int) -> Tuple[int, float, float]:
+        """Execute slice through SOR, returning (filled, value, slippage_bps delta)"""
         
         filled = 0
         value = 0.0
+        slippage_delta = 0.0
         
         # Venue selection based on instruction urgency
-        if instruction == OrderInstruction.SWEEP:
-            venues = ['NYSE', 'NASDAQ', 'ARCA', 'BATS', 'DARK']  # Hit all
-        elif instruction == OrderInstruction.MARKET_IOC:
-            venues = ['NYSE', 'NASDAQ', 'ARCA']  # Major venues
-        elif instruction == OrderInstruction.LIMIT_IOC:
-            venues = ['DARK', 'NYSE']  # Dark first
-        else:  # POST_ONLY
-            venues = ['ARCA']  # Single venue passive
+        venues = VENUES_BY_INSTR[instruction]
+        n_venues = len(venues)
         
         target_qty = slice_order['quantity']
+        venue_qty = target_qty // n_venues
         
-        for venue in venues:
-            if filled >= target_qty:
-                break
-                
-            venue_qty = target_qty // len(venues)
-            
+        # Simulate all venue outcomes, then record them
+        outcomes = simulate_sor(instruction, target_qty, n_venues, self.market_price, self.rng)
+        
+        for venue, (state, venue_filled, fill_price, slippage) in zip(venues, outcomes):
             # Create SOR order
             sor_order = {
-                'order_id': f'SOR_{sor_counter}',
+                'order_id': f'SOR_{self.id_prefix}{sor_counter}',
                 'parent_order_id': slice_order['order_id'],
                 'client_order_id': self.client_order_id,
                 'order_level': 3,
@@ -328,74 +556,32 @@ class ProductionVWAPSimulator:
                 'average_price': 0.0,
                 'state': 'PENDING',
                 'venue': venue,
-                'instruction': instruction.value
+                'instruction': INSTRUCTION_LABELS[instruction]
             }
             
-            self.add_snapshot(sor_order, 'NEW', timestamp)
+            if self.full_trace:
+                self.add_snapshot(sor_order, 'NEW', timestamp)
             sor_counter += 1
             
-            # Simulate execution based on urgency
-            if instruction == OrderInstruction.SWEEP:
-                # Always fills but with slippage
-                fill_price = self.market_price + random.uniform(0.02, 0.05)
-                sor_order['filled_quantity'] = venue_qty
-                sor_order['average_price'] = fill_price
-                sor_order['state'] = 'FILLED'
-                filled += venue_qty
-                value += venue_qty * fill_price
-                self.slippage_bps += 5  # Track slippage
-                
-            elif instruction == OrderInstruction.MARKET_IOC:
-                # Usually fills, some slippage
-                if random.random() < 0.85:
-                    fill_price = self.market_price + random.uniform(0.01, 0.03)
-                    sor_order['filled_quantity'] = venue_qty
-                    sor_order['average_price'] = fill_price
-                    sor_order['state'] = 'FILLED'
-                    filled += venue_qty
-                    value += venue_qty * fill_price
-                    self.slippage_bps += 2
-                else:
-                    # FADE
-                    sor_order['state'] = 'FADE'
-                    self.add_snapshot(sor_order, 'VENUE_FADE', timestamp + timedelta(milliseconds=20),
-                                    metadata={'fade_reason': 'Liquidity exhausted'})
-                    
-            elif instruction == OrderInstruction.LIMIT_IOC:
-                # Sometimes fills, minimal slippage
-                if random.random() < 0.7:
-                    fill_price = self.market_price + random.uniform(-0.01, 0.01)
-                    
-                    # Might be partial
-                    if random.random() < 0.3:
-                        partial_qty = venue_qty // 2
-                        sor_order['filled_quantity'] = partial_qty
-                        sor_order['average_price'] = fill_price
-                        sor_order['state'] = 'PARTIAL'
-                        filled += partial_qty
-                        value += partial_qty * fill_price
-                    else:
-                        sor_order['filled_quantity'] = venue_qty
-                        sor_order['average_price'] = fill_price
-                        sor_order['state'] = 'FILLED'
-                        filled += venue_qty
-                        value += venue_qty * fill_price
-                        
-            else:  # POST_ONLY
-                # Rarely fills immediately
-                if random.random() < 0.3:
-                    fill_price = self.market_price - 0.01  # Better price
-                    sor_order['filled_quantity'] = venue_qty
-                    sor_order['average_price'] = fill_price
-                    sor_order['state'] = 'FILLED'
-                    filled += venue_qty
-                    value += venue_qty * fill_price
-                    self.slippage_bps -= 1  # Negative slippage (good)
+            sor_order['filled_quantity'] = venue_filled
+            sor_order['average_price'] = fill_price
+            sor_order['state'] = state
+            
+            fade_metadata = {'fade_reason': 'Liquidity exhausted'} if state == 'FADE' else None
+            if fade_metadata and self.full_trace:
+                self.add_snapshot(sor_order, 'VENUE_FADE', timestamp + VENUE_FADE_DELAY,
+                                metadata=fade_metadata)
+                fade_metadata = None
+            
+            filled += venue_filled
+            value += venue_filled * fill_price
+            slippage_delta += slippage
             
-            timestamp += timedelta(milliseconds=30)
-            self.add_snapshot(sor_order, f'VENUE_{sor_order["state"]}', timestamp)
+            timestamp += VENUE_ACK_DELAY
+            self.add_snapshot(sor_order, f'VENUE_{sor_order["state"]}', timestamp,
+                            metadata=fade_metadata)
         
-        return filled, value
+        return filled, value, slippage_delta
     
     def update_parent_orders(self, algo_parent: Dict, client_order: Dict, 
                            timestamp: datetime, urgency: Urgency):
@@ -408,7 +594,7 @@ class ProductionVWAPSimulator:
         algo_parent['state'] = 'FILLED' if self.total_filled >= self.quantity else 'WORKING'
         
         # Track participation
-        if urgency in [Urgency.URGENT, Urgency.CRITICAL]:
+        if urgency >= Urgency.URGENT:
             algo_parent['participation_target'] = 'BEHIND'
         elif urgency == Urgency.PASSIVE:
             algo_parent['participation_target'] = 'AHEAD'
@@ -417,7 +603,12 @@ class ProductionVWAPSimulator:
             
         self.add_snapshot(algo_parent, 'ALGO_UPDATE', timestamp, urgency)
         
-        # Update client order
+        # Update client order, skipping the snapshot if nothing they see has changed
+        client_state = (self.total_filled, algo_parent['state'])
+        if client_state == self.last_client_state:
+            return
+        self.last_client_state = client_state
+        
         client_order['filled_quantity'] = self.total_filled
         client_order['remaining_quantity'] = self.quantity - self.total_filled
         client_order['average_price'] = algo_parent['average_price']
@@ -425,44 +616,105 @@ class ProductionVWAPSimulator:
         
         self.add_snapshot(client_order, 'CLIENT_UPDATE', timestamp)
 
+def client_order_id_for(trade_date: Optional[datetime], order_number: int) -> str:
+    """Client order id for the order_number'th order of a trade date (default today)"""
+    return f'PROD_{trade_date or datetime.now():%Y%m%d}_{order_number:03d}'
+
+def _run_one(order_number: int, quantity: int, ticker: str,
+             seed: Optional[int], full_trace: bool,
+             trade_date: Optional[datetime]) -> SnapshotBuffer:
+    """Run a single simulation - module level so worker processes can pickle it"""
+    sim = ProductionVWAPSimulator(client_order_id_for(trade_date, order_number), quantity, ticker,
+                                  seed=seed, full_trace=full_trace, trade_date=trade_date,
+                                  order_number=order_number)
+    return sim.generate_execution()
+
+def _run_job(job: Tuple) -> SnapshotBuffer:
+    """Unpack a generate_many job for Pool.imap"""
+    return _run_one(*job)
+
+def generate_many(n_orders: int, n_workers: Optional[int] = None, quantity: int = 100000,
+                  ticker: str = 'ASML.AS', seed: Optional[int] = None,
+                  full_trace: bool = False,
+                  trade_date: Optional[datetime] = None) -> Iterator[SnapshotBuffer]:
+    """
+    Run n_orders independent simulations across n_workers processes
+    
+    Order i gets seed + i, so a seeded batch is reproducible whatever
+    the worker count, and is numbered i + 1 so its order ids stay unique
+    across the batch. Record ids restart per order - they are renumbered
+    when the buffers are combined with extend.
+
+    Results are yielded in order as they complete, so the caller can
+    write each one out without holding the whole batch in memory.
+    """
+    jobs = [
+        (i + 1, quantity, ticker,
+         None if seed is None else seed + i, full_trace, trade_date)
+        for i in range(n_orders)
+    ]
+    with Pool(n_workers) as pool:
+        yield from pool.imap(_run_job, jobs)
+
 def main():
     """Generate production VWAP execution"""
+    parser = argparse.ArgumentParser(description='Generate production VWAP execution')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible output')
+    parser.add_argument('--orders', type=int, default=1, help='Number of client orders to simulate')
+    parser.add_argument('--workers', type=int, help='Worker processes for --orders > 1 (default: CPU count)')
+    parser.add_argument('--quiet', action='store_true', help='Suppress the per-hour execution report')
+    parser.add_argument('--full-trace', action='store_true',
+                       help='Record every SOR route event, not just its terminal state')
+    parser.add_argument('--date', type=datetime.fromisoformat,
+                       help='Trade date YYYY-MM-DD (default: today)')
+    parser.add_argument('--parquet', action='store_true',
+                       help='Write Parquet instead of CSV/JSON (requires pyarrow)')
+    args = parser.parse_args()
     
-    sim = ProductionVWAPSimulator(
-        client_order_id='PROD_20241216_001',
-        quantity=100000,
-        ticker='ASML.AS'
-    )
+    if args.parquet:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            parser.error('--parquet requires pyarrow (pip install pyarrow)')
     
-    snapshots = sim.generate_execution()
-    
-    # Export
-    with open('production_vwap.json', 'w') as f:
-        json.dump(snapshots, f, indent=2, default=str)
+    def run(snapshots):
+        if args.orders > 1:
+            for result in generate_many(args.orders, args.workers, seed=args.seed,
+                                        full_trace=args.full_trace, trade_date=args.date):
+                snapshots.extend(result)
+        else:
+            sim = ProductionVWAPSimulator(
+                client_order_id=client_order_id_for(args.date, 1),
+                quantity=100000,
+                ticker='ASML.AS',
+                seed=args.seed,
+                verbose=not args.quiet,
+                snapshots=snapshots,
+                full_trace=args.full_trace,
+                trade_date=args.date
+            )
+            sim.generate_execution()
     
-    # Export CSV
-    if snapshots:
-        keys = set()
-        for s in snapshots:
-            keys.update(s.keys())
-        
-        with open('production_vwap.csv', 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=sorted(keys))
-            writer.writeheader()
-            writer.writerows(snapshots)
+    if args.parquet:
+        # Arrow wants whole columns, so collect them and hand them over in one go
+        snapshots = SnapshotBuffer()
+        run(snapshots)
+        output_files = 'production_vwap.parquet'
+        pq.write_table(pa.Table.from_pydict(snapshots.export_columns()), output_files,
+                       compression='zstd', use_dictionary=True)
+    else:
+        # Text formats are written out as snapshots are taken
+        with SnapshotStreamWriter('production_vwap') as snapshots:
+            run(snapshots)
+        output_files = f'{snapshots.csv_path}, {snapshots.json_path}'
     
     print(f"\n✅ Generated {len(snapshots)} snapshots")
-    print("📁 Files: production_vwap.csv, production_vwap.json")
+    print(f"📁 Files: {output_files}")
     
     # Analysis
-    urgency_events = {}
-    for s in snapshots:
-        if 'urgency' in s:
-            urg = s['urgency']
-            urgency_events[urg] = urgency_events.get(urg, 0) + 1
-    
     print(f"\n📊 Urgency Distribution:")
-    for urg, count in urgency_events.items():
+    for urg, count in snapshots.urgency_counts.items():
         print(f"  {urg}: {count}")
 
 if __name__ == "__main__":
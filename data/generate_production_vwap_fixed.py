@@ -5,13 +5,18 @@ Every slice fill cascades up: SOR → Slice → Algo Parent → Client
 This is how real systems work - immediate propagation for position tracking
 """
 
-import json
 import csv
 import random
 import argparse
+import os
+from dataclasses import dataclass
+from operator import attrgetter
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
-from enum import Enum
+from itertools import accumulate
+from typing import List, Dict, Iterator, Optional, Tuple
+from enum import Enum, IntEnum
+
+from json_io import dumps_json
 
 class Urgency(Enum):
     PASSIVE = "PASSIVE"
@@ -26,12 +31,223 @@ class VenueResult(Enum):
     REJECT = "REJECT"
     NO_CONN = "NO_CONNECTION"
 
+class OrderState(IntEnum):
+    """Order states - held as small ints and only spelled out on export"""
+    PENDING = 0
+    ACCEPTED = 1
+    WORKING = 2
+    PARTIAL = 3
+    FILLED = 4
+    FADE = 5
+    REJECT = 6
+    NO_CONNECTION = 7
+
+STATE_LABELS = tuple(state.name for state in OrderState)
+VENUE_STATES = {result: OrderState[result.value] for result in VenueResult}
+
+# Venues in routing preference order
+VENUES = ('NYSE', 'NASDAQ', 'ARCA', 'BATS', 'DARK')
+
+# Fill price range around the market by urgency - aggressive slices pay up
+FILL_PRICE_RANGE = {
+    Urgency.CRITICAL: (0.02, 0.04),
+    Urgency.URGENT: (0.01, 0.02),
+    Urgency.NORMAL: (-0.01, 0.01),
+    Urgency.PASSIVE: (-0.01, 0.01),
+}
+PARTIAL_PRICE_RANGE = (-0.01, 0.02)
+
+def cumulative_market_volume_at(minutes_elapsed: int) -> float:
+    """Market volume traded by minutes_elapsed into the session"""
+    # Market volume follows intraday U-shape (high at open/close)
+    daily_market_volume = 30_000_000  # 30M shares/day for liquid stock
+    if minutes_elapsed < 60:  # First hour - 20% of volume
+        return daily_market_volume * 0.20 * (minutes_elapsed / 60)
+    elif minutes_elapsed < 360:  # Middle of day - 60% of volume
+        return daily_market_volume * (0.20 + 0.60 * ((minutes_elapsed - 60) / 300))
+    else:  # Last hour - 20% of volume
+        return daily_market_volume * (0.80 + 0.20 * ((minutes_elapsed - 360) / 60))
+
+# The curve only depends on the minute, so tabulate the 7 hour trading day once
+MARKET_VOLUME_BY_MINUTE = tuple(cumulative_market_volume_at(minute) for minute in range(7 * 60 + 1))
+
+# Fixed snapshot schema - the union of every order type's fields,
+# anything an order does not carry is left as None
+SNAPSHOT_COLUMNS = (
+    'order_id', 'parent_order_id', 'client_order_id', 'order_level', 'order_type',
+    'ticker', 'side', 'quantity', 'filled_quantity', 'remaining_quantity',
+    'average_price', 'state', 'client_name', 'algo_strategy', 'participation_pct',
+    'urgency', 'venue', 'reject_reason', 'fade_reason',
+    'market_price', 'snapshot_time', 'event_type', 'record_id'
+)
+STATE_INDEX = SNAPSHOT_COLUMNS.index('state')
+SNAPSHOT_TIME_INDEX = SNAPSHOT_COLUMNS.index('snapshot_time')
+RECORD_ID_INDEX = SNAPSHOT_COLUMNS.index('record_id')
+
+# Id templates, bound once
+_slice_id = 'SLICE_{:05d}'.format
+_sor_id = 'SOR_{:06d}'.format
+_record_id = 'REC_{:08d}'.format
+
+# Simulation clock - snapshot times are integer milliseconds since the session epoch
+MS_PER_MINUTE = 60_000
+MS_PER_HOUR = 60 * MS_PER_MINUTE
+MARKET_OPEN_MS = 9 * MS_PER_HOUR
+
+def format_row(row: Tuple, epoch: datetime) -> Tuple:
+    """
+    Render a snapshot row for export
+    
+    States are kept as OrderState, times as epoch offsets and record ids as
+    plain integers until now.
+    """
+    return (
+        *row[:STATE_INDEX],
+        STATE_LABELS[row[STATE_INDEX]],
+        *row[STATE_INDEX + 1:SNAPSHOT_TIME_INDEX],
+        (epoch + timedelta(milliseconds=row[SNAPSHOT_TIME_INDEX])).isoformat(),
+        *row[SNAPSHOT_TIME_INDEX + 1:RECORD_ID_INDEX],
+        _record_id(row[RECORD_ID_INDEX]),
+        *row[RECORD_ID_INDEX + 1:]
+    )
+
+@dataclass(slots=True)
+class OrderRow:
+    """Live state of one order in the hierarchy - fields mirror SNAPSHOT_COLUMNS"""
+    order_id: str
+    parent_order_id: Optional[str]
+    client_order_id: str
+    order_level: int
+    order_type: str
+    ticker: str
+    side: str
+    quantity: int
+    filled_quantity: int
+    remaining_quantity: int
+    average_price: float
+    state: OrderState
+    client_name: Optional[str] = None
+    algo_strategy: Optional[str] = None
+    participation_pct: Optional[float] = None
+    urgency: Optional[str] = None
+    venue: Optional[str] = None
+    reject_reason: Optional[str] = None
+    fade_reason: Optional[str] = None
+
+# Order fields lead the schema, the snapshot's own fields follow
+ORDER_FIELDS = SNAPSHOT_COLUMNS[:SNAPSHOT_COLUMNS.index('market_price')]
+get_order_fields = attrgetter(*ORDER_FIELDS)
+
+# Fields an update event can change - delta rows carry only these
+UPDATE_FIELDS = ('order_id', 'filled_quantity', 'remaining_quantity', 'average_price', 'state')
+ALGO_UPDATE_FIELDS = UPDATE_FIELDS + ('urgency', 'participation_pct')
+
+# Low-cardinality string columns - dictionary encoded in Parquet output
+DICTIONARY_COLUMNS = [
+    'client_order_id', 'order_type', 'ticker', 'side', 'state', 'client_name',
+    'algo_strategy', 'urgency', 'venue', 'reject_reason', 'fade_reason', 'event_type'
+]
+
+class SnapshotBuffer:
+    """
+    Column store for snapshots - one list per field in SNAPSHOT_COLUMNS
+    
+    Rows arrive already laid out in SNAPSHOT_COLUMNS order, so taking
+    a snapshot never copies the order dict.
+    """
+    
+    def __init__(self, epoch: datetime):
+        self.epoch = epoch
+        self.columns = {name: [] for name in SNAPSHOT_COLUMNS}
+    
+    def __len__(self) -> int:
+        return len(self.columns['record_id'])
+    
+    def append_row(self, row: List):
+        """Append a row laid out in SNAPSHOT_COLUMNS order"""
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+    
+    def rows(self) -> Iterator[Tuple]:
+        """Raw rows, with OrderState states, epoch offset times and integer record ids"""
+        return zip(*self.columns.values())
+    
+    def to_dicts(self) -> List[Dict]:
+        return [dict(zip(self.columns, format_row(row, self.epoch))) for row in self.rows()]
+
+class SnapshotStreamWriter:
+    """
+    Write snapshots straight to CSV and/or JSON as they are taken
+    
+    Drop-in for SnapshotBuffer when the rows only need to reach disk,
+    so memory stays flat however large the order is. The JSON file is
+    a single array with one object per line. A buffer, if given, also
+    collects every raw row - for outputs that need whole columns.
+    """
+    
+    def __init__(self, output: str, epoch: datetime, formats: Tuple[str, ...] = ('csv', 'json'),
+                 buffer: Optional[SnapshotBuffer] = None):
+        self.epoch = epoch
+        self.buffer = buffer
+        self.paths = []
+        self.csv_file = self.json_file = self.writer = None
+        if 'csv' in formats:
+            self.paths.append(f'{output}.csv')
+            self.csv_file = open(self.paths[-1], 'w', newline='')
+            self.writer = csv.writer(self.csv_file)
+            self.writer.writerow(SNAPSHOT_COLUMNS)
+        if 'json' in formats:
+            self.paths.append(f'{output}.json')
+            self.json_file = open(self.paths[-1], 'wb')
+            self.json_file.write(b'[\n')
+        self.separator = b''
+        self.count = 0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def append_row(self, row: List):
+        """Write a row laid out in SNAPSHOT_COLUMNS order"""
+        if self.buffer is not None:
+            self.buffer.append_row(row)
+        row = format_row(row, self.epoch)
+        if self.writer is not None:
+            self.writer.writerow(row)
+        if self.json_file is not None:
+            self.json_file.write(self.separator + dumps_json(dict(zip(SNAPSHOT_COLUMNS, row))))
+            self.separator = b',\n'
+        self.count += 1
+    
+    def close(self):
+        if self.json_file is not None:
+            self.json_file.write(b'\n]\n')
+            self.json_file.close()
+        if self.csv_file is not None:
+            self.csv_file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
 class ProductionVWAPGenerator:
-    def __init__(self, order_size: int, avg_slice_size: int, detail_level: str):
+    def __init__(self, order_size: int, avg_slice_size: int, detail_level: str,
+                 seed: Optional[int] = None, snapshots: Optional[SnapshotStreamWriter] = None,
+                 delta_updates: bool = False, epoch: Optional[datetime] = None):
         self.order_size = order_size
         self.avg_slice_size = avg_slice_size
         self.detail_level = detail_level
-        self.snapshots = []
+        # Which levels get their own snapshots - client_only keeps just the top of the tree
+        self._emit_slice = detail_level in ('full', 'summary')
+        self._emit_algo = detail_level in ('full', 'summary')
+        self._emit_sor = detail_level == 'full'
+        self.delta_updates = delta_updates  # fill cascade rows carry only changed fields
+        self.rng = random.Random(seed)
+        # Session start - snapshot times are millisecond offsets from it
+        self.epoch = epoch or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Snapshots are collected in memory unless a stream writer is supplied
+        self.snapshots = snapshots if snapshots is not None else SnapshotBuffer(self.epoch)
         self.record_id = 0
         
         # Tracking cumulative fills
@@ -54,18 +270,38 @@ class ProductionVWAPGenerator:
             'reject_count': 0
         }
         
-    def add_snapshot(self, order: Dict, event_type: str, timestamp: datetime):
+    def add_snapshot(self, order: OrderRow, event_type: str, timestamp: int):
         """Add a snapshot to the tick database"""
-        snapshot = order.copy()
-        snapshot['snapshot_time'] = timestamp.isoformat()
-        snapshot['event_type'] = event_type
-        snapshot['record_id'] = f'REC_{self.record_id:08d}'
-        snapshot['market_price'] = self.market_price
-        self.snapshots.append(snapshot)
+        self.snapshots.append_row((
+            *get_order_fields(order),
+            self.market_price,
+            timestamp,
+            event_type,
+            self.record_id
+        ))
+        self.record_id += 1
+        
+    def add_update_snapshot(self, order: OrderRow, event_type: str, timestamp: int,
+                            fields: Tuple[str, ...] = UPDATE_FIELDS):
+        """Add a fill cascade snapshot - just the changed fields in delta mode"""
+        if not self.delta_updates:
+            self.add_snapshot(order, event_type, timestamp)
+            return
+        
+        row = dict.fromkeys(ORDER_FIELDS)
+        for name in fields:
+            row[name] = getattr(order, name)
+        self.snapshots.append_row((
+            *row.values(),
+            self.market_price,
+            timestamp,
+            event_type,
+            self.record_id
+        ))
         self.record_id += 1
         
     def propagate_fill_up_chain(self, slice_filled: int, slice_value: float, 
-                                slice_order: Dict, timestamp: datetime, urgency: Urgency):
+                                slice_order: OrderRow, timestamp: int, urgency: Urgency):
         """Propagate fill from slice → algo parent → client"""
         
         if slice_filled == 0:
@@ -76,62 +312,57 @@ class ProductionVWAPGenerator:
         self.total_value += slice_value
         
         # 1. Update SLICE order
-        slice_order['filled_quantity'] += slice_filled
-        slice_order['remaining_quantity'] = slice_order['quantity'] - slice_order['filled_quantity']
-        if slice_order['filled_quantity'] > 0:
-            slice_order['average_price'] = slice_value / slice_filled
-        slice_order['state'] = 'FILLED' if slice_order['filled_quantity'] >= slice_order['quantity'] else 'PARTIAL'
+        slice_order.filled_quantity += slice_filled
+        slice_order.remaining_quantity = slice_order.quantity - slice_order.filled_quantity
+        if slice_order.filled_quantity > 0:
+            slice_order.average_price = slice_value / slice_filled
+        slice_order.state = OrderState.FILLED if slice_order.filled_quantity >= slice_order.quantity else OrderState.PARTIAL
         
-        self.add_snapshot(slice_order, 'SLICE_UPDATE', timestamp)
+        if self._emit_slice:
+            self.add_update_snapshot(slice_order, 'SLICE_UPDATE', timestamp)
         
         # 2. Propagate to ALGO PARENT
-        timestamp += timedelta(milliseconds=5)
-        self.algo_parent['filled_quantity'] = self.total_filled
-        self.algo_parent['remaining_quantity'] = self.order_size - self.total_filled
+        timestamp += 5
+        self.algo_parent.filled_quantity = self.total_filled
+        self.algo_parent.remaining_quantity = self.order_size - self.total_filled
         if self.total_filled > 0:
-            self.algo_parent['average_price'] = self.total_value / self.total_filled
-        self.algo_parent['state'] = 'FILLED' if self.total_filled >= self.order_size else 'WORKING'
-        self.algo_parent['urgency'] = urgency.value
+            self.algo_parent.average_price = self.total_value / self.total_filled
+        self.algo_parent.state = OrderState.FILLED if self.total_filled >= self.order_size else OrderState.WORKING
+        self.algo_parent.urgency = urgency.value
         
         # Calculate participation rate (our volume as % of market volume)
         # Simulate market volume - typically 10-50M shares/day for liquid stock
-        hour = (datetime.fromisoformat(timestamp.isoformat()).hour - 9)
-        minutes_elapsed = hour * 60 + timestamp.minute
-        total_minutes = 7 * 60  # 7 hour trading day
-        
-        # Market volume follows intraday U-shape (high at open/close)
-        daily_market_volume = 30_000_000  # 30M shares/day for liquid stock
-        if minutes_elapsed < 60:  # First hour - 20% of volume
-            cumulative_market_volume = daily_market_volume * 0.20 * (minutes_elapsed / 60)
-        elif minutes_elapsed < 360:  # Middle of day - 60% of volume
-            cumulative_market_volume = daily_market_volume * (0.20 + 0.60 * ((minutes_elapsed - 60) / 300))
-        else:  # Last hour - 20% of volume
-            cumulative_market_volume = daily_market_volume * (0.80 + 0.20 * ((minutes_elapsed - 360) / 60))
+        minutes_elapsed = (timestamp - MARKET_OPEN_MS) // MS_PER_MINUTE
+        if 0 <= minutes_elapsed < len(MARKET_VOLUME_BY_MINUTE):
+            cumulative_market_volume = MARKET_VOLUME_BY_MINUTE[minutes_elapsed]
+        else:
+            cumulative_market_volume = cumulative_market_volume_at(minutes_elapsed)
         
         # Our participation rate = our volume / market volume
         # Should fluctuate around target (e.g., 20%) with some noise
         if cumulative_market_volume > 0:
             actual_participation = (self.total_filled / cumulative_market_volume) * 100
             # Add some realistic noise
-            participation_pct = actual_participation + random.uniform(-2, 2)
+            participation_pct = actual_participation + self.rng.uniform(-2, 2)
             participation_pct = max(0, min(30, participation_pct))  # Cap at 30% max
         else:
             participation_pct = 0
             
-        self.algo_parent['participation_pct'] = round(participation_pct, 1)
+        self.algo_parent.participation_pct = round(participation_pct, 1)
         
-        self.add_snapshot(self.algo_parent, 'ALGO_UPDATE', timestamp)
+        if self._emit_algo:
+            self.add_update_snapshot(self.algo_parent, 'ALGO_UPDATE', timestamp, ALGO_UPDATE_FIELDS)
         
         # 3. Propagate to CLIENT ORDER
-        timestamp += timedelta(milliseconds=5)
-        self.client_order['filled_quantity'] = self.total_filled
-        self.client_order['remaining_quantity'] = self.order_size - self.total_filled
-        self.client_order['average_price'] = self.algo_parent['average_price']
-        self.client_order['state'] = self.algo_parent['state']
+        timestamp += 5
+        self.client_order.filled_quantity = self.total_filled
+        self.client_order.remaining_quantity = self.order_size - self.total_filled
+        self.client_order.average_price = self.algo_parent.average_price
+        self.client_order.state = self.algo_parent.state
         
-        self.add_snapshot(self.client_order, 'CLIENT_UPDATE', timestamp)
+        self.add_update_snapshot(self.client_order, 'CLIENT_UPDATE', timestamp)
         
-    def generate(self) -> List[Dict]:
+    def generate(self) -> SnapshotBuffer:
         """Generate complete VWAP execution with proper propagation"""
         
         print(f"Generating VWAP for {self.order_size:,} shares")
@@ -139,49 +370,48 @@ class ProductionVWAPGenerator:
         print(f"Detail level: {self.detail_level}")
         
         # Start time
-        base_time = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
-        current_time = base_time
+        current_time = MARKET_OPEN_MS
         
         # 1. CLIENT ORDER
-        self.client_order = {
-            'order_id': 'CLIENT_001',
-            'parent_order_id': None,
-            'client_order_id': 'C20241216_PROD',
-            'order_level': 0,
-            'order_type': 'CLIENT',
-            'ticker': 'ASML.AS',
-            'side': 'Buy',
-            'quantity': self.order_size,
-            'filled_quantity': 0,
-            'remaining_quantity': self.order_size,
-            'average_price': 0.0,
-            'state': 'PENDING',
-            'client_name': 'Wellington Management'
-        }
+        self.client_order = OrderRow(
+            order_id='CLIENT_001',
+            parent_order_id=None,
+            client_order_id='C20241216_PROD',
+            order_level=0,
+            order_type='CLIENT',
+            ticker='ASML.AS',
+            side='Buy',
+            quantity=self.order_size,
+            filled_quantity=0,
+            remaining_quantity=self.order_size,
+            average_price=0.0,
+            state=OrderState.PENDING,
+            client_name='Wellington Management'
+        )
         self.add_snapshot(self.client_order, 'NEW', current_time)
         
         # 2. CLIENT ACCEPTED
-        current_time += timedelta(seconds=1)
-        self.client_order['state'] = 'ACCEPTED'
+        current_time += 1000
+        self.client_order.state = OrderState.ACCEPTED
         self.add_snapshot(self.client_order, 'ACCEPTED', current_time)
         
         # 3. ALGO PARENT
-        self.algo_parent = {
-            'order_id': 'ALGO_001',
-            'parent_order_id': 'CLIENT_001',
-            'client_order_id': 'C20241216_PROD',
-            'order_level': 1,
-            'order_type': 'ALGO_PARENT',
-            'ticker': 'ASML.AS',
-            'side': 'Buy',
-            'quantity': self.order_size,
-            'filled_quantity': 0,
-            'remaining_quantity': self.order_size,
-            'average_price': 0.0,
-            'state': 'WORKING',
-            'algo_strategy': 'VWAP',
-            'participation_pct': 0.0
-        }
+        self.algo_parent = OrderRow(
+            order_id='ALGO_001',
+            parent_order_id='CLIENT_001',
+            client_order_id='C20241216_PROD',
+            order_level=1,
+            order_type='ALGO_PARENT',
+            ticker='ASML.AS',
+            side='Buy',
+            quantity=self.order_size,
+            filled_quantity=0,
+            remaining_quantity=self.order_size,
+            average_price=0.0,
+            state=OrderState.WORKING,
+            algo_strategy='VWAP',
+            participation_pct=0.0
+        )
         self.add_snapshot(self.algo_parent, 'NEW', current_time)
         
         # 4. GENERATE SLICES
@@ -216,49 +446,61 @@ class ProductionVWAPGenerator:
             
             # Generate slices for this hour (cap for file size)
             hour_slices = min(slices_per_hour, 50)
+            num_routes = 3 if urgency in (Urgency.CRITICAL, Urgency.URGENT) else 2
+            urgency_value = urgency.value
+            
+            # Slice size range based on urgency
+            if urgency == Urgency.CRITICAL:
+                size_range = (self.avg_slice_size * 2, self.avg_slice_size * 4)
+            elif urgency == Urgency.URGENT:
+                size_range = (self.avg_slice_size, self.avg_slice_size * 2)
+            else:
+                size_range = (self.avg_slice_size // 2, self.avg_slice_size)
+            
+            # Draw the whole hour's randomness up front: slice sizes, timing
+            # jitter, the market's walk and a (outcome, price) roll per route
+            rand, randint, uniform = self.rng.random, self.rng.randint, self.rng.uniform
+            slice_sizes = [randint(*size_range) for _ in range(hour_slices)]
+            jitter_seconds = [randint(0, 30) for _ in range(hour_slices)]
+            price_steps = [uniform(-0.1, 0.1) for _ in range(hour_slices)]
+            price_path = list(accumulate(price_steps, initial=self.market_price))[1:]
+            outcome_rolls = [rand() for _ in range(hour_slices * num_routes)]
+            price_rolls = [rand() for _ in range(hour_slices * num_routes)]
+            fill_low, fill_high = FILL_PRICE_RANGE[urgency]
+            partial_low, partial_high = PARTIAL_PRICE_RANGE
             
             for slice_in_hour in range(hour_slices):
                 if self.total_filled >= self.order_size:
                     break
                     
                 # Time within hour
-                current_time = base_time + timedelta(
-                    hours=hour,
-                    minutes=(60 // hour_slices) * slice_in_hour,
-                    seconds=random.randint(0, 30)
-                )
+                current_time = (MARKET_OPEN_MS + hour * MS_PER_HOUR
+                                + (60 // hour_slices) * slice_in_hour * MS_PER_MINUTE
+                                + jitter_seconds[slice_in_hour] * 1000)
                 
                 # Market moves
-                self.market_price += random.uniform(-0.1, 0.1)
+                self.market_price = price_path[slice_in_hour]
                 
-                # Slice size based on urgency
-                if urgency == Urgency.CRITICAL:
-                    slice_size = random.randint(self.avg_slice_size * 2, self.avg_slice_size * 4)
-                elif urgency == Urgency.URGENT:
-                    slice_size = random.randint(self.avg_slice_size, self.avg_slice_size * 2)
-                else:
-                    slice_size = random.randint(self.avg_slice_size // 2, self.avg_slice_size)
-                    
-                slice_size = min(slice_size, self.order_size - self.total_filled)
+                slice_size = min(slice_sizes[slice_in_hour], self.order_size - self.total_filled)
                 
                 # Create slice
-                slice_order = {
-                    'order_id': f'SLICE_{slice_counter:05d}',
-                    'parent_order_id': 'ALGO_001',
-                    'client_order_id': 'C20241216_PROD',
-                    'order_level': 2,
-                    'order_type': 'ALGO_SLICE',
-                    'ticker': 'ASML.AS',
-                    'side': 'Buy',
-                    'quantity': slice_size,
-                    'filled_quantity': 0,
-                    'remaining_quantity': slice_size,
-                    'average_price': 0.0,
-                    'state': 'PENDING',
-                    'urgency': urgency.value
-                }
+                slice_order = OrderRow(
+                    order_id=_slice_id(slice_counter),
+                    parent_order_id='ALGO_001',
+                    client_order_id='C20241216_PROD',
+                    order_level=2,
+                    order_type='ALGO_SLICE',
+                    ticker='ASML.AS',
+                    side='Buy',
+                    quantity=slice_size,
+                    filled_quantity=0,
+                    remaining_quantity=slice_size,
+                    average_price=0.0,
+                    state=OrderState.PENDING,
+                    urgency=urgency_value
+                )
                 
-                if self.detail_level in ['full', 'summary']:
+                if self._emit_slice:
                     self.add_snapshot(slice_order, 'NEW', current_time)
                 
                 self.stats['total_slices'] += 1
@@ -267,13 +509,13 @@ class ProductionVWAPGenerator:
                 # Route to venues
                 slice_filled = 0
                 slice_value = 0.0
-                num_routes = 3 if urgency in [Urgency.CRITICAL, Urgency.URGENT] else 2
+                fill_time = current_time
                 
                 for route_num in range(num_routes):
                     if slice_filled >= slice_size:
                         break
                         
-                    venue = ['NYSE', 'NASDAQ', 'ARCA', 'BATS', 'DARK'][route_num % 5]
+                    venue = VENUES[route_num]  # at most 3 routes per slice
                     route_size = min((slice_size - slice_filled) // (num_routes - route_num), 
                                      slice_size - slice_filled)
                     
@@ -281,10 +523,12 @@ class ProductionVWAPGenerator:
                         continue
                     
                     # Route timestamp
-                    route_time = current_time + timedelta(milliseconds=10 + route_num * 50)
+                    route_time = current_time + 10 + route_num * 50
                     
                     # Determine outcome
-                    outcome_rand = random.random()
+                    roll = slice_in_hour * num_routes + route_num
+                    outcome_rand = outcome_rolls[roll]
+                    price_rand = price_rolls[roll]
                     
                     if outcome_rand < 0.05:  # 5% fade
                         result = VenueResult.FADE
@@ -295,11 +539,11 @@ class ProductionVWAPGenerator:
                     elif outcome_rand < 0.15:  # 10% partial
                         result = VenueResult.PARTIAL
                         filled_qty = route_size // 2
-                        fill_price = self.market_price + random.uniform(-0.01, 0.02)
+                        fill_price = self.market_price + partial_low + (partial_high - partial_low) * price_rand
                         self.stats['partial_count'] += 1
                         
-                    elif outcome_rand < 0.17:  # 2% reject
-                        result = VenueResult.REJECT if random.random() < 0.5 else VenueResult.NO_CONN
+                    elif outcome_rand < 0.17:  # 2% reject - half are lost connections
+                        result = VenueResult.REJECT if outcome_rand < 0.16 else VenueResult.NO_CONN
                         filled_qty = 0
                         fill_price = 0
                         self.stats['reject_count'] += 1
@@ -308,36 +552,31 @@ class ProductionVWAPGenerator:
                         result = VenueResult.FILLED
                         filled_qty = route_size
                         # Price based on urgency
-                        if urgency == Urgency.CRITICAL:
-                            fill_price = self.market_price + random.uniform(0.02, 0.04)
-                        elif urgency == Urgency.URGENT:
-                            fill_price = self.market_price + random.uniform(0.01, 0.02)
-                        else:
-                            fill_price = self.market_price + random.uniform(-0.01, 0.01)
+                        fill_price = self.market_price + fill_low + (fill_high - fill_low) * price_rand
                     
                     # Create SOR route
-                    if self.detail_level == 'full':
-                        sor_order = {
-                            'order_id': f'SOR_{sor_counter:06d}',
-                            'parent_order_id': slice_order['order_id'],
-                            'client_order_id': 'C20241216_PROD',
-                            'order_level': 3,
-                            'order_type': 'ROUTE',
-                            'ticker': 'ASML.AS',
-                            'side': 'Buy',
-                            'quantity': route_size,
-                            'filled_quantity': filled_qty,
-                            'remaining_quantity': route_size - filled_qty,
-                            'average_price': fill_price if filled_qty > 0 else 0,
-                            'state': result.value,
-                            'venue': venue,
-                            'urgency': urgency.value
-                        }
+                    if self._emit_sor:
+                        sor_order = OrderRow(
+                            order_id=_sor_id(sor_counter),
+                            parent_order_id=slice_order.order_id,
+                            client_order_id='C20241216_PROD',
+                            order_level=3,
+                            order_type='ROUTE',
+                            ticker='ASML.AS',
+                            side='Buy',
+                            quantity=route_size,
+                            filled_quantity=filled_qty,
+                            remaining_quantity=route_size - filled_qty,
+                            average_price=fill_price if filled_qty > 0 else 0,
+                            state=VENUE_STATES[result],
+                            venue=venue,
+                            urgency=urgency_value
+                        )
                         
                         if result == VenueResult.NO_CONN:
-                            sor_order['reject_reason'] = f'No connection to {venue}-FIX-01'
+                            sor_order.reject_reason = f'No connection to {venue}-FIX-01'
                         elif result == VenueResult.FADE:
-                            sor_order['fade_reason'] = 'Liquidity taken by competitor'
+                            sor_order.fade_reason = 'Liquidity taken by competitor'
                             
                         self.add_snapshot(sor_order, f'VENUE_{result.value}', route_time)
                     
@@ -347,22 +586,27 @@ class ProductionVWAPGenerator:
                     if filled_qty > 0:
                         slice_filled += filled_qty
                         slice_value += filled_qty * fill_price
+                        fill_time = route_time + 10
                         
-                        # IMPORTANT: Propagate each fill up the chain immediately
-                        if self.detail_level != 'none':
+                        # IMPORTANT: Full detail propagates each fill up the chain immediately
+                        if self.detail_level == 'full':
                             self.propagate_fill_up_chain(
                                 filled_qty, 
                                 filled_qty * fill_price,
                                 slice_order,
-                                route_time + timedelta(milliseconds=10),
+                                fill_time,
                                 urgency
                             )
+                
+                # Other levels get one cascade per slice, at its last fill
+                if self.detail_level != 'full':
+                    self.propagate_fill_up_chain(slice_filled, slice_value, slice_order, fill_time, urgency)
         
         # Final update
-        final_time = base_time + timedelta(hours=7)
+        final_time = MARKET_OPEN_MS + 7 * MS_PER_HOUR
         if self.total_filled >= self.order_size:
-            self.client_order['state'] = 'FILLED'
-            self.algo_parent['state'] = 'FILLED'
+            self.client_order.state = OrderState.FILLED
+            self.algo_parent.state = OrderState.FILLED
             self.add_snapshot(self.algo_parent, 'COMPLETED', final_time)
             self.add_snapshot(self.client_order, 'COMPLETED', final_time)
         
@@ -380,6 +624,28 @@ class ProductionVWAPGenerator:
         
         return self.snapshots
 
+def write_parquet(snapshots: SnapshotBuffer, path: str):
+    """Write buffered snapshots to Parquet - needs pyarrow"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    
+    columns = dict(snapshots.columns)
+    # States go out as int8 codes with a string dictionary
+    columns['state'] = pa.DictionaryArray.from_arrays(
+        pa.array(list(map(int, columns['state'])), type=pa.int8()), list(STATE_LABELS))
+    # Epoch offsets become a native timestamp column
+    epoch_ms = (snapshots.epoch - datetime(1970, 1, 1)) // timedelta(milliseconds=1)
+    columns['snapshot_time'] = pa.array(
+        [epoch_ms + t for t in columns['snapshot_time']], type=pa.timestamp('ms'))
+    # Record ids get their REC_ prefix in one vectorised pass
+    record_ids = pc.cast(pa.array(columns['record_id'], type=pa.int64()), pa.string())
+    columns['record_id'] = pc.binary_join_element_wise(
+        'REC_', pc.utf8_lpad(record_ids, width=8, padding='0'), '')
+    table = pa.Table.from_pydict(columns)
+    pq.write_table(table, path, compression='zstd',
+                   use_dictionary=DICTIONARY_COLUMNS, data_page_size=1 << 20)
+
 def main():
     parser = argparse.ArgumentParser(description='Generate production VWAP data with proper propagation')
     parser.add_argument('--size', type=int, default=2000000, help='Order size')
@@ -387,38 +653,60 @@ def main():
     parser.add_argument('--detail', choices=['full', 'summary', 'client_only'], 
                        default='summary', help='Level of detail')
     parser.add_argument('--output', default='production_vwap_fixed', help='Output filename base')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible output')
+    parser.add_argument('--delta-updates', action='store_true',
+                       help='Fill cascade updates carry only the fields they change')
+    parser.add_argument('--format', choices=['csv', 'json', 'text', 'parquet', 'all'], default='text',
+                       help='Output format - text writes CSV and JSON, streamed as snapshots are '
+                            'taken. all adds Parquet when pyarrow is installed. Parquet holds '
+                            'every snapshot in memory until the run finishes')
     
     args = parser.parse_args()
     
-    # Generate data
-    generator = ProductionVWAPGenerator(
+    formats = {'text': ('csv', 'json'), 'all': ('csv', 'json', 'parquet')}.get(args.format, (args.format,))
+    if 'parquet' in formats:
+        try:
+            import pyarrow.parquet  # noqa: F401 - written by write_parquet
+        except ImportError:
+            if args.format == 'parquet':
+                parser.error('--format parquet requires pyarrow (pip install pyarrow)')
+            print("⚠️  pyarrow not installed - skipping Parquet")
+            formats = ('csv', 'json')
+    text_formats = tuple(fmt for fmt in formats if fmt != 'parquet')
+    
+    # One session epoch shared by the generator and whatever renders its times
+    epoch = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    params = dict(
         order_size=args.size,
         avg_slice_size=args.slice_size,
-        detail_level=args.detail
+        detail_level=args.detail,
+        seed=args.seed,
+        delta_updates=args.delta_updates,
+        epoch=epoch
     )
     
-    snapshots = generator.generate()
-    
-    # Export
-    with open(f'{args.output}.json', 'w') as f:
-        json.dump(snapshots, f, indent=2, default=str)
-    
-    if snapshots:
-        keys = set()
-        for s in snapshots:
-            keys.update(s.keys())
-        
-        with open(f'{args.output}.csv', 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=sorted(keys))
-            writer.writeheader()
-            writer.writerows(snapshots)
+    # Arrow wants whole columns, so Parquet output collects them as the run goes
+    columns = SnapshotBuffer(epoch) if 'parquet' in formats else None
+    if text_formats:
+        # Text formats are written out as snapshots are taken
+        with SnapshotStreamWriter(args.output, epoch, text_formats, buffer=columns) as snapshots:
+            generator = ProductionVWAPGenerator(**params, snapshots=snapshots)
+            generator.generate()
+        output_paths = snapshots.paths
+    else:
+        generator = ProductionVWAPGenerator(**params, snapshots=columns)
+        generator.generate()
+        output_paths = []
+    if columns is not None:
+        output_paths.append(f'{args.output}.parquet')
+        write_parquet(columns, output_paths[-1])
     
-    print(f"\n✅ Saved to {args.output}.csv and {args.output}.json")
+    print(f"\n✅ Saved to {' and '.join(output_paths)}")
     
     # File size check
-    import os
-    csv_size = os.path.getsize(f'{args.output}.csv') / (1024 * 1024)
-    print(f"📁 CSV size: {csv_size:.2f} MB")
+    for path in output_paths:
+        file_size = os.path.getsize(path) / (1024 * 1024)
+        print(f"📁 {path} size: {file_size:.2f} MB")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,9 +6,40 @@ Creates tick database showing what support engineers actually see
 
 import json
 import csv
+from collections import Counter
 from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import random
 
+class Scenario(NamedTuple):
+    """How a slice is worked across the venues"""
+    sor_offset: int         # SOR ids are sor_offset + slice_num * 10 + route index
+    instruction: str
+    acked: bool             # venues ACCEPT before the outcome arrives
+    # (venue, qty, filled_qty, latency_ms, price_offset) - None is drawn at random,
+    # no fill at all is a fade
+    routes: List[Tuple[str, int, int, Optional[int], Optional[float]]]
+    # (venue, latency_ms, price_offset) that picks up any shortfall
+    retry: Optional[Tuple[str, int, float]] = None
+
+SCENARIOS: Dict[str, Scenario] = {
+    # Normal execution - split across 3 venues
+    'normal': Scenario(70000, 'IOC', True, [
+        ('NYSE', 5000, 5000, None, None),
+        ('NASDAQ', 5000, 5000, None, None),
+        ('ARCA', 5000, 5000, None, None),
+    ]),
+    # First attempt fades and part-fills, the dark pool mops up at a better price
+    'fade_retry': Scenario(71000, 'EOE', False, [
+        ('NYSE', 8000, 8000, 60, 0.01),
+        ('NASDAQ', 8000, 0, 30, None),
+        ('BATS', 4000, 1500, 40, 0.02),
+    ], retry=('DARK', 100, -0.01)),
+    # Not modelled yet - the slice completes unfilled. No routes, so the
+    # SOR id offset is unused
+    'partial_fills': Scenario(0, 'IOC', False, []),
+}
+
 def generate_realistic_vwap_flow():
     """Generate a realistic VWAP execution with market microstructure issues"""
     
@@ -33,6 +64,32 @@ def generate_realistic_vwap_flow():
         record_id += 1
         return snapshot
     
+    def new_route(sor_id, parent_id, venue, qty, instruction, attempt):
+        return {
+            'order_id': f'SOR_{sor_id}',
+            'parent_order_id': parent_id,
+            'client_order_id': 'C20241216_100001',
+            'order_level': 3,
+            'order_type': 'ROUTE',
+            'ticker': 'ASML.AS',
+            'side': 'Buy',
+            'quantity': qty,
+            'filled_quantity': 0,
+            'remaining_quantity': qty,
+            'average_price': 0.0,
+            'state': 'PENDING',
+            'venue': venue,
+            'instruction': instruction,
+            'attempt': attempt
+        }
+    
+    def fill_route(sor_order, filled_qty, fill_price):
+        sor_order['filled_quantity'] = filled_qty
+        sor_order['remaining_quantity'] = sor_order['quantity'] - filled_qty
+        sor_order['average_price'] = fill_price
+        sor_order['state'] = 'FILLED' if filled_qty >= sor_order['quantity'] else 'PARTIAL'
+        return sor_order['state']
+    
     # 1. CLIENT ORDER
     client_order = {
         'order_id': 'CLIENT_C20241216_100001',
@@ -115,147 +172,65 @@ def generate_realistic_vwap_flow():
         slice_filled = 0
         slice_value = 0
         
-        if slice_config['scenario'] == 'normal':
-            # Normal execution - split across 3 venues
-            venues = [('NYSE', 5000), ('NASDAQ', 5000), ('ARCA', 5000)]
+        scenario = SCENARIOS[slice_config['scenario']]
+        
+        # Each slice owns a block of 10 SOR ids, so repeated scenarios don't clash
+        sor_base = scenario.sor_offset + slice_num * 10
+        
+        for idx, (venue, qty, filled_qty, latency_ms, price_offset) in enumerate(scenario.routes):
+            current_time += timedelta(milliseconds=50)
             
-            for venue, qty in venues:
-                current_time += timedelta(milliseconds=50)
-                
-                # SOR child
-                sor_order = {
-                    'order_id': f'SOR_{70000 + slice_num * 10 + venues.index((venue, qty))}',
-                    'parent_order_id': slice_order['order_id'],
-                    'client_order_id': 'C20241216_100001',
-                    'order_level': 3,
-                    'order_type': 'ROUTE',
-                    'ticker': 'ASML.AS',
-                    'side': 'Buy',
-                    'quantity': qty,
-                    'filled_quantity': 0,
-                    'remaining_quantity': qty,
-                    'average_price': 0.0,
-                    'state': 'PENDING',
-                    'venue': venue,
-                    'instruction': 'IOC'
-                }
-                add_snapshot(sor_order, 'NEW', current_time, market_price)
-                
+            # SOR child
+            sor_order = new_route(sor_base + idx, slice_order['order_id'],
+                                  venue, qty, scenario.instruction, attempt=1)
+            add_snapshot(sor_order, 'NEW', current_time, market_price)
+            
+            if scenario.acked:
                 # Venue accepts
                 current_time += timedelta(milliseconds=20)
                 sor_order['state'] = 'ACCEPTED'
                 add_snapshot(sor_order, 'VENUE_ACCEPTED', current_time, market_price)
-                
-                # Venue fills
-                current_time += timedelta(milliseconds=random.randint(50, 150))
-                fill_price = market_price + random.uniform(-0.02, 0.05)
-                sor_order['filled_quantity'] = qty
-                sor_order['remaining_quantity'] = 0
-                sor_order['average_price'] = fill_price
-                sor_order['state'] = 'FILLED'
-                add_snapshot(sor_order, 'VENUE_FILLED', current_time, market_price)
-                
-                slice_filled += qty
-                slice_value += qty * fill_price
+            
+            if latency_ms is None:
+                latency_ms = random.randint(50, 150)
+            current_time += timedelta(milliseconds=latency_ms)
+            
+            if filled_qty == 0:
+                # FADE - someone else got liquidity
+                sor_order['state'] = 'FADE'
+                sor_order['fade_reason'] = 'Liquidity taken by competitor'
+                add_snapshot(sor_order, 'VENUE_FADE', current_time, market_price)
+                print(f"    ❌ FADE at {venue}: Lost {qty:,} shares")
+                continue
+            
+            if price_offset is None:
+                price_offset = random.uniform(-0.02, 0.05)
+            fill_price = market_price + price_offset
+            state = fill_route(sor_order, filled_qty, fill_price)
+            add_snapshot(sor_order, f'VENUE_{state}', current_time, market_price)
+            if state == 'PARTIAL':
+                print(f"    ⚠️  PARTIAL at {venue}: {filled_qty:,}/{qty:,}")
+            slice_filled += filled_qty
+            slice_value += filled_qty * fill_price
         
-        elif slice_config['scenario'] == 'fade_retry':
-            # First attempt - experience fade
-            venues_try1 = [('NYSE', 8000), ('NASDAQ', 8000), ('BATS', 4000)]
+        # RETRY for unfilled quantity
+        remaining = slice_config['qty'] - slice_filled
+        if scenario.retry and remaining > 0:
+            venue, latency_ms, price_offset = scenario.retry
+            current_time += timedelta(milliseconds=500)
+            print(f"    🔄 RETRY: {remaining:,} shares remaining")
             
-            for venue, qty in venues_try1:
-                current_time += timedelta(milliseconds=50)
-                
-                sor_order = {
-                    'order_id': f'SOR_{71000 + venues_try1.index((venue, qty))}',
-                    'parent_order_id': slice_order['order_id'],
-                    'client_order_id': 'C20241216_100001',
-                    'order_level': 3,
-                    'order_type': 'ROUTE',
-                    'ticker': 'ASML.AS',
-                    'side': 'Buy',
-                    'quantity': qty,
-                    'filled_quantity': 0,
-                    'remaining_quantity': qty,
-                    'average_price': 0.0,
-                    'state': 'PENDING',
-                    'venue': venue,
-                    'instruction': 'EOE',
-                    'attempt': 1
-                }
-                add_snapshot(sor_order, 'NEW', current_time, market_price)
-                
-                if venue == 'NASDAQ':
-                    # FADE - someone else got liquidity
-                    current_time += timedelta(milliseconds=30)
-                    sor_order['state'] = 'FADE'
-                    sor_order['fade_reason'] = 'Liquidity taken by competitor'
-                    add_snapshot(sor_order, 'VENUE_FADE', current_time, market_price)
-                    print(f"    ❌ FADE at {venue}: Lost {qty:,} shares")
-                
-                elif venue == 'BATS':
-                    # PARTIAL FILL
-                    current_time += timedelta(milliseconds=40)
-                    partial_qty = 1500
-                    fill_price = market_price + 0.02
-                    sor_order['filled_quantity'] = partial_qty
-                    sor_order['remaining_quantity'] = qty - partial_qty
-                    sor_order['average_price'] = fill_price
-                    sor_order['state'] = 'PARTIAL'
-                    add_snapshot(sor_order, 'VENUE_PARTIAL', current_time, market_price)
-                    slice_filled += partial_qty
-                    slice_value += partial_qty * fill_price
-                    print(f"    ⚠️  PARTIAL at {venue}: {partial_qty:,}/{qty:,}")
-                
-                else:  # NYSE
-                    # FILLED
-                    current_time += timedelta(milliseconds=60)
-                    fill_price = market_price + 0.01
-                    sor_order['filled_quantity'] = qty
-                    sor_order['remaining_quantity'] = 0
-                    sor_order['average_price'] = fill_price
-                    sor_order['state'] = 'FILLED'
-                    add_snapshot(sor_order, 'VENUE_FILLED', current_time, market_price)
-                    slice_filled += qty
-                    slice_value += qty * fill_price
+            # The retry takes the last id in the slice's block
+            sor_order = new_route(sor_base + 9, slice_order['order_id'],
+                                  venue, remaining, 'IOC', attempt=2)
+            add_snapshot(sor_order, 'NEW_RETRY', current_time, market_price)
             
-            # RETRY for unfilled quantity
-            remaining = slice_config['qty'] - slice_filled
-            if remaining > 0:
-                current_time += timedelta(milliseconds=500)
-                print(f"    🔄 RETRY: {remaining:,} shares remaining")
-                
-                # Retry orders
-                retry_venues = [('DARK', remaining)]
-                for venue, qty in retry_venues:
-                    sor_order = {
-                        'order_id': f'SOR_{71100}',
-                        'parent_order_id': slice_order['order_id'],
-                        'client_order_id': 'C20241216_100001',
-                        'order_level': 3,
-                        'order_type': 'ROUTE',
-                        'ticker': 'ASML.AS',
-                        'side': 'Buy',
-                        'quantity': qty,
-                        'filled_quantity': 0,
-                        'remaining_quantity': qty,
-                        'average_price': 0.0,
-                        'state': 'PENDING',
-                        'venue': venue,
-                        'instruction': 'IOC',
-                        'attempt': 2
-                    }
-                    add_snapshot(sor_order, 'NEW_RETRY', current_time, market_price)
-                    
-                    # Dark pool fills
-                    current_time += timedelta(milliseconds=100)
-                    fill_price = market_price - 0.01  # Better price in dark
-                    sor_order['filled_quantity'] = qty
-                    sor_order['remaining_quantity'] = 0
-                    sor_order['average_price'] = fill_price
-                    sor_order['state'] = 'FILLED'
-                    add_snapshot(sor_order, 'VENUE_FILLED', current_time, market_price)
-                    slice_filled += qty
-                    slice_value += qty * fill_price
+            current_time += timedelta(milliseconds=latency_ms)
+            fill_price = market_price + price_offset
+            fill_route(sor_order, remaining, fill_price)
+            add_snapshot(sor_order, 'VENUE_FILLED', current_time, market_price)
+            slice_filled += remaining
+            slice_value += remaining * fill_price
         
         # Update slice order
         current_time += timedelta(milliseconds=50)
@@ -287,7 +262,7 @@ def generate_realistic_vwap_flow():
     
     # Export
     with open('realistic_flow.json', 'w') as f:
-        json.dump(snapshots, f, indent=2, default=str)
+        json.dump(snapshots, f, indent=2)
     
     # Export CSV
     if snapshots:
@@ -303,15 +278,13 @@ def generate_realistic_vwap_flow():
     print(f"\n✅ Generated {len(snapshots)} snapshots")
     print(f"📊 Final: {total_filled:,}/50,000 @ {total_value/total_filled:.2f}")
     
-    # Analysis
-    fade_events = [s for s in snapshots if s.get('event_type') == 'VENUE_FADE']
-    partial_events = [s for s in snapshots if s.get('event_type') == 'VENUE_PARTIAL']
-    retry_events = [s for s in snapshots if s.get('event_type') == 'NEW_RETRY']
+    # Analysis - one pass over the snapshots
+    event_counts = Counter(s['event_type'] for s in snapshots)
     
     print(f"\n📈 Events:")
-    print(f"  Fades: {len(fade_events)}")
-    print(f"  Partials: {len(partial_events)}")  
-    print(f"  Retries: {len(retry_events)}")
+    print(f"  Fades: {event_counts['VENUE_FADE']}")
+    print(f"  Partials: {event_counts['VENUE_PARTIAL']}")  
+    print(f"  Retries: {event_counts['NEW_RETRY']}")
     
     return snapshots
 
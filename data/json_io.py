@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+JSON helpers shared by the data scripts
+Uses orjson when it is installed and the stdlib encoder otherwise,
+writing the same bytes either way
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+def dumps_json(data, indent: bool = False) -> bytes:
+    """Encode data as compact JSON bytes, or indented by two spaces"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode()
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+
+def read_json(path):
+    """Load a JSON file"""
+    with open(path, 'rb') as f:
+        if orjson is not None:
+            return orjson.loads(f.read())
+        return json.load(f)
+
+def write_json(path, data, indent: bool = False):
+    """Write data to a JSON file, compact or indented by two spaces"""
+    with open(path, 'wb') as f:
+        f.write(dumps_json(data, indent))
@@ -11,10 +11,18 @@ import random
 import sys
 import argparse
 import math
+from multiprocessing import Pool
 from datetime import datetime, timedelta, time
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from dataclasses import dataclass, fields
 from enum import Enum
+from itertools import islice
+from operator import attrgetter, itemgetter
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
 
 # ============== Data Models ==============
 
@@ -54,9 +62,9 @@ class AlgoType(Enum):
     ICEBERG = "Iceberg"
     SNIPER = "Sniper"
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    """Order data structure"""
+    """Order data structure - slotted, as a large run keeps thousands alive"""
     order_id: str
     parent_order_id: Optional[str]
     client_order_id: str
@@ -70,8 +78,8 @@ class Order:
     state: str
     venue: Optional[str]
     algo_type: Optional[str]
-    timestamp: datetime
-    update_timestamp: datetime
+    timestamp: int  # ms since the execution's start time
+    update_timestamp: int
     
     # Additional fields
     remaining_quantity: int = 0
@@ -84,6 +92,13 @@ class Order:
     
     def __post_init__(self):
         self.remaining_quantity = self.quantity - self.filled_quantity
+    
+    def to_dict(self) -> Dict:
+        """Shallow dict of the fields - they are all flat, so asdict's deep copy is wasted"""
+        return dict(zip(ORDER_FIELDS, _order_values(self)))
+
+ORDER_FIELDS = tuple(field.name for field in fields(Order))
+_order_values = attrgetter(*ORDER_FIELDS)
 
 # ============== Market Data ==============
 
@@ -99,6 +114,7 @@ EU_LARGE_CAP_STOCKS = [
     {"ticker": "AZN.L", "name": "AstraZeneca", "price": 110.0, "daily_volume": 3500000},
     {"ticker": "SHEL.L", "name": "Shell", "price": 28.0, "daily_volume": 15000000},
 ]
+STOCKS_BY_TICKER = {stock['ticker']: stock for stock in EU_LARGE_CAP_STOCKS}
 
 CLIENTS = [
     "Blackrock Asset Management", "Vanguard Group", "State Street Global",
@@ -114,112 +130,170 @@ DESKS = ["Equity Trading", "Program Trading", "Electronic Trading", "Cash Equity
 
 # ============== VWAP Profile ==============
 
-def get_vwap_profile() -> List[float]:
-    """
-    Generate a realistic VWAP volume distribution profile for a trading day
-    Returns hourly participation rates (9:00 to 17:30 CET)
-    """
-    # Typical European equity market volume distribution
-    # Higher at open, lunch dip, pickup in afternoon, spike at close
-    hourly_percentages = [
-        0.12,  # 9:00-10:00 - Opening volume
-        0.09,  # 10:00-11:00
-        0.08,  # 11:00-12:00
-        0.06,  # 12:00-13:00 - Lunch dip
-        0.07,  # 13:00-14:00
-        0.08,  # 14:00-15:00
-        0.09,  # 15:00-16:00
-        0.10,  # 16:00-17:00
-        0.15,  # 17:00-17:30 - Closing auction preparation
-        0.16,  # 17:30 - Closing auction
-    ]
-    return hourly_percentages
+# Realistic VWAP volume distribution for a trading day - hourly
+# participation rates (9:00 to 17:30 CET). Typical European equity market:
+# higher at open, lunch dip, pickup in afternoon, spike at close
+VWAP_PROFILE = (
+    0.12,  # 9:00-10:00 - Opening volume
+    0.09,  # 10:00-11:00
+    0.08,  # 11:00-12:00
+    0.06,  # 12:00-13:00 - Lunch dip
+    0.07,  # 13:00-14:00
+    0.08,  # 14:00-15:00
+    0.09,  # 15:00-16:00
+    0.10,  # 16:00-17:00
+    0.15,  # 17:00-17:30 - Closing auction preparation
+    0.16,  # 17:30 - Closing auction
+)
 
-def get_intraday_volatility_pattern() -> List[float]:
-    """Get typical intraday volatility pattern"""
-    # Higher volatility at open and close
-    return [1.5, 1.2, 1.0, 0.8, 0.9, 1.0, 1.1, 1.3, 1.6, 2.0]
+# Typical intraday volatility pattern - higher at open and close
+VOLATILITY_PATTERN = (1.5, 1.2, 1.0, 0.8, 0.9, 1.0, 1.1, 1.3, 1.6, 2.0)
 
 # ============== Order Generation ==============
 
+# SOR venue selection based on liquidity and fees - the share of the
+# remaining quantity a venue is offered when the router picks it
+SOR_VENUE_WEIGHTS = {
+    Venue.NYSE: 0.35,
+    Venue.NASDAQ: 0.25,
+    Venue.ARCA: 0.15,
+    Venue.BATS: 0.10,
+    Venue.DARK_POOL: 0.10,
+    Venue.IEX: 0.05,
+}
+SOR_VENUES = tuple(SOR_VENUE_WEIGHTS)
+
+# Simulation clock - order and fill times are integer milliseconds since the
+# execution's start time, rendered as ISO strings only when records are built
+MS_PER_SECOND = 1000
+MS_PER_MINUTE = 60 * MS_PER_SECOND
+MS_PER_HOUR = 60 * MS_PER_MINUTE
+MARKET_OPEN_HOUR = 9
+
+SLICES_PER_HOUR = range(3, 9)
+SLICE_JITTER_MINUTES = range(0, 6)
+COUNTERPARTIES = ("MM01", "MM02", "HFT01", "BANK01", "FLOW01")
+FILL_DELAYS_MS = range(100, 1001)
+
+def _split_quantity(quantity: int, parts: int) -> List[int]:
+    """Split quantity into equal parts, the last one taking the remainder"""
+    part = quantity // parts
+    return [part] * (parts - 1) + [quantity - part * (parts - 1)]
+
 class VWAPAlgoSimulator:
     """Simulates VWAP algo execution"""
     
-    def __init__(self, parent_order: Order, stock_info: Dict, start_time: datetime):
+    def __init__(self, parent_order: Order, stock_info: Dict, start_time: datetime,
+                 seed: Optional[int] = None):
         self.parent_order = parent_order
         self.stock_info = stock_info
         self.start_time = start_time
-        self.vwap_profile = get_vwap_profile()
-        self.volatility_pattern = get_intraday_volatility_pattern()
+        # Order ids carry epoch seconds - resolve the start once and add offsets
+        self.base_epoch = int(start_time.timestamp())
+        # Where the start falls in its day, for time-of-day volatility
+        self.start_of_day_ms = (start_time - start_time.replace(hour=0, minute=0, second=0, microsecond=0)) \
+            // timedelta(milliseconds=1)
+        self.vwap_profile = VWAP_PROFILE
+        self.volatility_pattern = VOLATILITY_PATTERN
+        # Buys pay half the spread, sells give it up
+        self.side_sign = 1.0 if parent_order.side == "Buy" else -1.0
+        # Own generator per simulator - seeded runs reproduce in any process
+        self.rng = random.Random(seed)
         self.current_filled = 0
         self.orders = []
         self.fills = []
+    
+    def _iso(self, ms: int) -> str:
+        """Render a simulation time as an ISO timestamp"""
+        return (self.start_time + timedelta(milliseconds=ms)).isoformat()
+    
+    def _order_dict(self, order: Order) -> Dict:
+        """Order as an output record, with its times rendered"""
+        record = order.to_dict()
+        record['timestamp'] = self._iso(order.timestamp)
+        record['update_timestamp'] = self._iso(order.update_timestamp)
+        return record
         
     def generate_execution(self) -> Tuple[List[Dict], List[Dict]]:
         """Generate child orders and fills for VWAP execution"""
         
         # Calculate slice sizes based on VWAP profile
         total_quantity = self.parent_order.quantity
-        current_time = self.start_time
+        orders_append, orders_extend, fills_extend = self.orders.append, self.orders.extend, self.fills.extend
         
         # Add parent order to orders list
-        parent_dict = asdict(self.parent_order)
+        parent_dict = self._order_dict(self.parent_order)
         parent_dict['state'] = OrderState.ACCEPTED.value
-        parent_dict['timestamp'] = current_time.isoformat()
-        parent_dict['update_timestamp'] = current_time.isoformat()
-        self.orders.append(parent_dict)
+        orders_append(parent_dict)
         
         # Generate child orders throughout the day
-        for hour_idx, participation_rate in enumerate(self.vwap_profile):
-            hour_quantity = int(total_quantity * participation_rate)
+        for order_ms, planned_qty in self._slice_plan(total_quantity):
+            remaining = total_quantity - self.current_filled
+            if remaining <= 0:
+                break
+            
+            # Determine slice quantity
+            slice_qty = min(planned_qty, remaining)
             
-            if hour_quantity == 0:
+            if slice_qty <= 0:
                 continue
-                
-            # Split hour quantity into multiple child orders (3-8 per hour)
-            num_slices = random.randint(3, 8)
-            slice_size = hour_quantity // num_slices
             
-            for slice_idx in range(num_slices):
-                if self.current_filled >= total_quantity:
-                    break
-                    
-                # Calculate timing within the hour
-                minutes_offset = (60 // num_slices) * slice_idx + random.randint(0, 5)
-                order_time = current_time + timedelta(hours=hour_idx, minutes=minutes_offset)
-                
-                # Determine slice quantity
-                remaining = total_quantity - self.current_filled
-                slice_qty = min(slice_size + random.randint(-slice_size//4, slice_size//4), remaining)
-                
-                if slice_qty <= 0:
-                    continue
-                
-                # Create child order
-                child_order = self._create_child_order(slice_qty, order_time)
-                self.orders.append(asdict(child_order))
-                
-                # Route to SOR and generate fills
-                sor_orders, sor_fills = self._route_to_sor(child_order, order_time)
-                self.orders.extend(sor_orders)
-                self.fills.extend(sor_fills)
-                
-                self.current_filled += slice_qty
+            # Create child order
+            child_order = self._create_child_order(slice_qty, order_ms)
+            orders_append(self._order_dict(child_order))
+            
+            # Route to SOR and generate fills
+            sor_orders, sor_fills = self._route_to_sor(child_order, order_ms)
+            orders_extend(sor_orders)
+            fills_extend(sor_fills)
+            
+            self.current_filled += slice_qty
         
         # Update parent order status
         parent_dict['state'] = OrderState.FILLED.value if self.current_filled >= total_quantity else OrderState.PARTIALLY_FILLED.value
         parent_dict['filled_quantity'] = self.current_filled
         parent_dict['remaining_quantity'] = total_quantity - self.current_filled
-        parent_dict['update_timestamp'] = (current_time + timedelta(hours=8, minutes=30)).isoformat()
+        parent_dict['update_timestamp'] = self._iso(8 * MS_PER_HOUR + 30 * MS_PER_MINUTE)
         
         return self.orders, self.fills
     
-    def _create_child_order(self, quantity: int, timestamp: datetime) -> Order:
+    def _slice_plan(self, total_quantity: int) -> List[Tuple[int, int]]:
+        """
+        Time and planned size of every child slice for the day, drawn up front
+        
+        Each hour's share of the VWAP profile is split into 3-8 slices, spaced
+        evenly through the hour with a few minutes' jitter and a +/-25% size wobble.
+        """
+        hour_quantities = [int(total_quantity * rate) for rate in self.vwap_profile]
+        slice_counts = [
+            num_slices if hour_quantity else 0
+            for hour_quantity, num_slices in zip(
+                hour_quantities, self.rng.choices(SLICES_PER_HOUR, k=len(hour_quantities)))
+        ]
+        jitters = iter(self.rng.choices(SLICE_JITTER_MINUTES, k=sum(slice_counts)))
+        
+        plan = []
+        for hour_idx, (hour_quantity, num_slices) in enumerate(zip(hour_quantities, slice_counts)):
+            if num_slices == 0:
+                continue
+            slice_size = hour_quantity // num_slices
+            wobble = slice_size // 4
+            size_deltas = self.rng.choices(range(-wobble, wobble + 1), k=num_slices)
+            spacing = 60 // num_slices
+            plan.extend(
+                (hour_idx * MS_PER_HOUR + (spacing * slice_idx + jitter) * MS_PER_MINUTE,
+                 slice_size + size_delta)
+                # size_deltas leads so zip stops before taking a jitter from the next hour
+                for slice_idx, (size_delta, jitter) in enumerate(zip(size_deltas, jitters))
+            )
+        return plan
+    
+    def _create_child_order(self, quantity: int, timestamp: int) -> Order:
         """Create a child order from parent"""
         return Order(
             order_id=f"ALGO_{self.parent_order.order_id}_{len(self.orders):04d}",
             parent_order_id=self.parent_order.order_id,
-            client_order_id=f"CLI_{timestamp.timestamp():.0f}",
+            client_order_id=f"CLI_{self.base_epoch + timestamp // MS_PER_SECOND}",
             ticker=self.parent_order.ticker,
             side=self.parent_order.side,
             quantity=quantity,
@@ -238,41 +312,41 @@ class VWAPAlgoSimulator:
             strategy="VWAP"
         )
     
-    def _route_to_sor(self, child_order: Order, timestamp: datetime) -> Tuple[List[Dict], List[Dict]]:
-        """Smart Order Router - splits order across venues"""
-        sor_orders = []
-        sor_fills = []
+    def _allocate_venues(self, quantity: int) -> List[Tuple[Venue, int]]:
+        """Decide how much of an order each venue gets - numbers only, no records"""
+        remaining_qty = quantity
+        allocations = []
         
-        # Venue selection based on liquidity and fees
-        venue_distribution = {
-            Venue.NYSE: 0.35,
-            Venue.NASDAQ: 0.25,
-            Venue.ARCA: 0.15,
-            Venue.BATS: 0.10,
-            Venue.DARK_POOL: 0.10,
-            Venue.IEX: 0.05,
-        }
-        
-        remaining_qty = child_order.quantity
-        venues = list(venue_distribution.keys())
-        random.shuffle(venues)
-        
-        for venue in venues[:random.randint(1, 4)]:  # Use 1-4 venues
+        for venue in self.rng.sample(SOR_VENUES, self.rng.randint(1, 4)):  # Use 1-4 venues
             if remaining_qty <= 0:
                 break
                 
             # Calculate venue slice
-            venue_qty = int(remaining_qty * venue_distribution[venue] * random.uniform(0.8, 1.2))
+            venue_qty = int(remaining_qty * SOR_VENUE_WEIGHTS[venue] * self.rng.uniform(0.8, 1.2))
             venue_qty = min(venue_qty, remaining_qty)
             
             if venue_qty <= 0:
                 continue
             
+            allocations.append((venue, venue_qty))
+            remaining_qty -= venue_qty
+        
+        return allocations
+    
+    def _route_to_sor(self, child_order: Order, timestamp: int) -> Tuple[List[Dict], List[Dict]]:
+        """Smart Order Router - splits order across venues"""
+        sor_orders = []
+        sor_fills = []
+        orders_append, fills_append = sor_orders.append, sor_fills.append
+        
+        allocations = self._allocate_venues(child_order.quantity)
+        
+        for venue, venue_qty in allocations:
             # Create SOR child order
             sor_order = Order(
                 order_id=f"SOR_{child_order.order_id}_{venue.value}",
                 parent_order_id=child_order.order_id,
-                client_order_id=f"SOR_{timestamp.timestamp():.0f}",
+                client_order_id=f"SOR_{self.base_epoch + timestamp // MS_PER_SECOND}",
                 ticker=child_order.ticker,
                 side=child_order.side,
                 quantity=venue_qty,
@@ -283,24 +357,27 @@ class VWAPAlgoSimulator:
                 state=OrderState.FILLED.value,
                 venue=venue.value,
                 algo_type=None,
-                timestamp=timestamp + timedelta(milliseconds=random.randint(1, 100)),
-                update_timestamp=timestamp + timedelta(milliseconds=random.randint(100, 500)),
+                timestamp=timestamp + self.rng.randint(1, 100),
+                update_timestamp=timestamp + self.rng.randint(100, 500),
                 client_name=child_order.client_name,
                 trader=child_order.trader,
                 desk=child_order.desk,
                 strategy="SOR"
             )
             
-            sor_orders.append(asdict(sor_order))
+            orders_append(self._order_dict(sor_order))
             
-            # Generate fills (potentially multiple per SOR order)
-            fill_count = random.randint(1, 3)
-            fill_qty_per = venue_qty // fill_count
+            # Generate fills (potentially multiple per SOR order) - each field
+            # is drawn for all of the order's fills at once
+            fill_qtys = _split_quantity(venue_qty, self.rng.randint(1, 3))
+            fill_count = len(fill_qtys)
+            price_noise = [self.rng.uniform(-0.01, 0.01) for _ in fill_qtys]
+            fill_delays = self.rng.choices(FILL_DELAYS_MS, k=fill_count)
+            counterparties = self.rng.choices(COUNTERPARTIES, k=fill_count)
             
-            for fill_idx in range(fill_count):
-                fill_qty = fill_qty_per if fill_idx < fill_count - 1 else venue_qty - (fill_qty_per * fill_idx)
-                
-                fill = {
+            for fill_idx, (fill_qty, noise, delay_ms, counterparty) in enumerate(
+                    zip(fill_qtys, price_noise, fill_delays, counterparties)):
+                fills_append({
                     "fill_id": f"FILL_{sor_order.order_id}_{fill_idx:02d}",
                     "order_id": sor_order.order_id,
                     "parent_order_id": child_order.order_id,
@@ -308,47 +385,40 @@ class VWAPAlgoSimulator:
                     "ticker": sor_order.ticker,
                     "side": sor_order.side,
                     "quantity": fill_qty,
-                    "price": sor_order.price + random.uniform(-0.01, 0.01),
+                    "price": sor_order.price + noise,
                     "venue": venue.value,
-                    "timestamp": (timestamp + timedelta(milliseconds=random.randint(100, 1000))).isoformat(),
-                    "counterparty": random.choice(["MM01", "MM02", "HFT01", "BANK01", "FLOW01"]),
+                    "timestamp": self._iso(timestamp + delay_ms),
+                    "counterparty": counterparty,
                     "commission": round(fill_qty * sor_order.price * 0.0002, 2),
                     "fees": round(fill_qty * sor_order.price * 0.00003, 2),
-                }
-                sor_fills.append(fill)
-            
-            remaining_qty -= venue_qty
+                })
         
         # Update child order
+        remaining_qty = child_order.quantity - sum(venue_qty for _, venue_qty in allocations)
         child_order.filled_quantity = child_order.quantity - remaining_qty
         child_order.state = OrderState.FILLED.value if remaining_qty == 0 else OrderState.PARTIALLY_FILLED.value
-        child_order.update_timestamp = timestamp + timedelta(seconds=1)
+        child_order.update_timestamp = timestamp + MS_PER_SECOND
         
         return sor_orders, sor_fills
     
-    def _calculate_execution_price(self, timestamp: datetime) -> float:
+    def _calculate_execution_price(self, timestamp: int) -> float:
         """Calculate realistic execution price with slippage and spread"""
         base_price = self.stock_info['price']
         
         # Time-based volatility
-        hour = timestamp.hour - 9  # Market opens at 9
+        hour = (self.start_of_day_ms + timestamp) // MS_PER_HOUR - MARKET_OPEN_HOUR
         if hour < 0 or hour >= len(self.volatility_pattern):
             hour = 0
         volatility = self.volatility_pattern[hour]
         
         # Price movement with volatility
-        price_move = random.gauss(0, 0.002 * volatility)  # 0.2% std dev * volatility
+        price_move = self.rng.gauss(0, 0.002 * volatility)  # 0.2% std dev * volatility
         
         # Add spread
         spread = base_price * 0.0005  # 5 bps spread
         
         # Side-based adjustment
-        if self.parent_order.side == "Buy":
-            price = base_price * (1 + price_move) + spread/2
-        else:
-            price = base_price * (1 + price_move) - spread/2
-            
-        return round(price, 2)
+        return round(base_price * (1 + price_move) + self.side_sign * spread * 0.5, 2)
 
 # ============== Data Generation Functions ==============
 
@@ -357,25 +427,30 @@ def generate_vwap_execution(
     quantity: int = None,
     side: str = None,
     client: str = None,
-    start_time: datetime = None
+    start_time: datetime = None,
+    order_number: int = None,
+    seed: int = None
 ) -> Tuple[List[Dict], List[Dict]]:
     """Generate a complete VWAP execution flow"""
     
+    rng = random.Random(seed)
+    
     # Select random values if not provided
-    stock = random.choice(EU_LARGE_CAP_STOCKS)
+    stock = rng.choice(EU_LARGE_CAP_STOCKS)
     if ticker:
-        stock = next((s for s in EU_LARGE_CAP_STOCKS if s['ticker'] == ticker), stock)
+        stock = STOCKS_BY_TICKER.get(ticker, stock)
     
-    quantity = quantity or random.randint(50000, 500000)
-    side = side or random.choice(["Buy", "Sell"])
-    client = client or random.choice(CLIENTS)
+    quantity = quantity or rng.randint(50000, 500000)
+    side = side or rng.choice(["Buy", "Sell"])
+    client = client or rng.choice(CLIENTS)
     start_time = start_time or datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    order_number = order_number or rng.randint(1000, 9999)
     
     # Create parent order
     parent_order = Order(
-        order_id=f"ORD_{start_time.timestamp():.0f}_{random.randint(1000, 9999)}",
+        order_id=f"ORD_{start_time.timestamp():.0f}_{order_number:04d}",
         parent_order_id=None,
-        client_order_id=f"CLIENT_{random.randint(100000, 999999)}",
+        client_order_id=f"CLIENT_{rng.randint(100000, 999999)}",
         ticker=stock['ticker'],
         side=side,
         quantity=quantity,
@@ -386,130 +461,222 @@ def generate_vwap_execution(
         state=OrderState.PENDING.value,
         venue=None,
         algo_type=AlgoType.VWAP.value,
-        timestamp=start_time,
-        update_timestamp=start_time,
+        timestamp=0,
+        update_timestamp=0,
         client_name=client,
-        trader=random.choice(TRADERS),
-        desk=random.choice(DESKS),
+        trader=rng.choice(TRADERS),
+        desk=rng.choice(DESKS),
         strategy="VWAP All Day"
     )
     
     # Run VWAP simulation
-    simulator = VWAPAlgoSimulator(parent_order, stock, start_time)
+    simulator = VWAPAlgoSimulator(parent_order, stock, start_time, seed=rng.getrandbits(64))
     orders, fills = simulator.generate_execution()
     
     return orders, fills
 
+def _run_vwap_execution(seed: Optional[int], order_number: int, ticker: Optional[str],
+                        quantity: Optional[int], side: Optional[str],
+                        client: Optional[str]) -> Tuple[List[Dict], List[Dict]]:
+    """Run one VWAP execution - module level so worker processes can pickle it"""
+    return generate_vwap_execution(ticker=ticker, quantity=quantity, side=side, client=client,
+                                   order_number=order_number, seed=seed)
+
+def generate_vwap_executions(
+    count: int,
+    workers: Optional[int] = None,
+    ticker: str = None,
+    quantity: int = None,
+    side: str = None,
+    client: str = None,
+    seed: int = None
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Generate count independent VWAP executions across worker processes
+    
+    Execution i gets seed + i, so a seeded batch is reproducible whatever
+    the worker count, and is numbered so parent order ids stay unique
+    across the batch.
+    """
+    jobs = [
+        (None if seed is None else seed + i, i + 1, ticker, quantity, side, client)
+        for i in range(count)
+    ]
+    orders, fills = [], []
+    with Pool(workers) as pool:
+        for run_orders, run_fills in pool.starmap(_run_vwap_execution, jobs):
+            orders.extend(run_orders)
+            fills.extend(run_fills)
+    return orders, fills
+
+# Asset classes and their properties
+ASSET_CLASSES = {
+    "Equity": {
+        "subtypes": ["Common Stock", "Preferred Stock", "ADR", "ETF"],
+        "exchanges": ["NYSE", "NASDAQ", "LSE", "XETRA", "TSE"],
+        "currencies": ["USD", "EUR", "GBP", "JPY", "CHF"],
+    },
+    "Fixed Income": {
+        "subtypes": ["Government Bond", "Corporate Bond", "Municipal Bond", "MBS", "ABS"],
+        "exchanges": ["OTC", "NYSE Bonds", "LSE", "EuroTLX"],
+        "currencies": ["USD", "EUR", "GBP"],
+    },
+    "Derivative": {
+        "subtypes": ["Option", "Future", "Swap", "Forward", "Swaption"],
+        "exchanges": ["CME", "ICE", "EUREX", "LME", "OTC"],
+        "currencies": ["USD", "EUR", "GBP", "JPY"],
+    },
+    "Commodity": {
+        "subtypes": ["Energy", "Metal", "Agriculture"],
+        "exchanges": ["CME", "ICE", "LME", "SHFE"],
+        "currencies": ["USD", "EUR"],
+    },
+    "FX": {
+        "subtypes": ["Spot", "Forward", "NDF", "Option"],
+        "exchanges": ["OTC", "CME", "ICE"],
+        "currencies": ["USD", "EUR", "GBP", "JPY", "CHF", "AUD", "CAD"],
+    }
+}
+
+# Classes whose subtypes include options get a strike price
+OPTION_CLASSES = {name for name, info in ASSET_CLASSES.items() if "Option" in info["subtypes"]}
+
+ISSUERS = [
+    "US Treasury", "German Bund", "UK Gilt", "Apple Inc", "Microsoft Corp",
+    "JP Morgan Chase", "Goldman Sachs", "Deutsche Bank", "BNP Paribas",
+    "Toyota Motor", "Nestle SA", "Royal Dutch Shell", "HSBC Holdings"
+]
+
 def generate_instrument_reference_data(count: int = 100) -> List[Dict]:
     """Generate detailed instrument reference data"""
+    return list(_rows(instrument_reference_columns(count)))
+
+def _rows(columns: Dict[str, List]) -> Iterable[Dict]:
+    """Records from equal-length columns"""
+    return (dict(zip(columns, values)) for values in zip(*columns.values()))
+
+def instrument_reference_columns(count: int = 100) -> Dict[str, List]:
+    """Instrument reference data as columns, field name to one value per instrument"""
     
-    instruments = []
-    
-    # Asset classes and their properties
-    asset_classes = {
-        "Equity": {
-            "subtypes": ["Common Stock", "Preferred Stock", "ADR", "ETF"],
-            "exchanges": ["NYSE", "NASDAQ", "LSE", "XETRA", "TSE"],
-            "currencies": ["USD", "EUR", "GBP", "JPY", "CHF"],
-        },
-        "Fixed Income": {
-            "subtypes": ["Government Bond", "Corporate Bond", "Municipal Bond", "MBS", "ABS"],
-            "exchanges": ["OTC", "NYSE Bonds", "LSE", "EuroTLX"],
-            "currencies": ["USD", "EUR", "GBP"],
-        },
-        "Derivative": {
-            "subtypes": ["Option", "Future", "Swap", "Forward", "Swaption"],
-            "exchanges": ["CME", "ICE", "EUREX", "LME", "OTC"],
-            "currencies": ["USD", "EUR", "GBP", "JPY"],
-        },
-        "Commodity": {
-            "subtypes": ["Energy", "Metal", "Agriculture"],
-            "exchanges": ["CME", "ICE", "LME", "SHFE"],
-            "currencies": ["USD", "EUR"],
-        },
-        "FX": {
-            "subtypes": ["Spot", "Forward", "NDF", "Option"],
-            "exchanges": ["OTC", "CME", "ICE"],
-            "currencies": ["USD", "EUR", "GBP", "JPY", "CHF", "AUD", "CAD"],
-        }
-    }
+    # Built a column at a time: each field is drawn for every instrument in one
+    # batched call, and class-specific fields are blanked for the other classes
+    choices, rand = random.choices, random.random
+    now = datetime.now()
+    rows = range(count)
     
-    issuers = [
-        "US Treasury", "German Bund", "UK Gilt", "Apple Inc", "Microsoft Corp",
-        "JP Morgan Chase", "Goldman Sachs", "Deutsche Bank", "BNP Paribas",
-        "Toyota Motor", "Nestle SA", "Royal Dutch Shell", "HSBC Holdings"
-    ]
+    def dates(days: range, sign: int = 1) -> List[str]:
+        drawn = choices(days, k=count)
+        # Format each distinct day once - there are far fewer days than instruments
+        labels = {d: (now + timedelta(days=sign * d)).strftime("%Y-%m-%d") for d in set(drawn)}
+        return [labels[d] for d in drawn]
     
-    for i in range(count):
-        asset_class = random.choice(list(asset_classes.keys()))
-        asset_info = asset_classes[asset_class]
-        
-        instrument = {
-            # Identifiers
-            "instrument_id": f"INST{i+1:06d}",
-            "isin": f"{random.choice(['US', 'GB', 'DE', 'FR', 'JP'])}{random.randint(1000000000, 9999999999):010d}",
-            "cusip": f"{random.randint(100000000, 999999999):09d}" if asset_class in ["Equity", "Fixed Income"] else None,
-            "sedol": f"{random.randint(1000000, 9999999):07d}" if random.random() < 0.5 else None,
-            "bloomberg_ticker": f"{random.choice(['AAPL', 'MSFT', 'JPM', 'GS', 'DBK', 'NESN', 'SHEL'])} {random.choice(['US', 'LN', 'GY', 'FP'])} {asset_class[:3].upper()}",
-            "reuters_ric": f"{random.choice(['AAPL', 'MSFT', 'JPM', 'GS', 'DBK'])}{'.' + random.choice(['N', 'L', 'DE', 'PA']) if random.random() < 0.7 else ''}",
-            
-            # Classification
-            "asset_class": asset_class,
-            "instrument_type": random.choice(asset_info["subtypes"]),
-            "sector": random.choice(["Technology", "Financials", "Healthcare", "Energy", "Consumer", "Industrials"]),
-            "industry": random.choice(["Software", "Banking", "Pharma", "Oil & Gas", "Retail", "Aerospace"]),
-            
-            # Description
-            "name": f"{random.choice(issuers)} {random.choice(asset_info['subtypes'])}",
-            "description": f"{random.choice(asset_info['subtypes'])} issued by {random.choice(issuers)}",
-            "issuer": random.choice(issuers),
-            "issue_date": (datetime.now() - timedelta(days=random.randint(30, 3650))).strftime("%Y-%m-%d"),
-            
-            # Trading info
-            "exchange": random.choice(asset_info["exchanges"]),
-            "currency": random.choice(asset_info["currencies"]),
-            "trading_currency": random.choice(asset_info["currencies"]),
-            "settlement_currency": random.choice(asset_info["currencies"]),
-            "tick_size": random.choice([0.01, 0.001, 0.0001, 0.00001]),
-            "lot_size": random.choice([1, 10, 100, 1000]),
-            "min_trade_size": random.choice([1, 10, 100, 1000]),
-            
-            # Market data
-            "last_price": round(random.uniform(1, 1000), 2),
-            "bid_price": round(random.uniform(1, 1000), 2),
-            "ask_price": round(random.uniform(1, 1000), 2),
-            "volume": random.randint(10000, 10000000),
-            "market_cap": random.randint(1000000, 1000000000000) if asset_class == "Equity" else None,
-            
-            # Fixed Income specific
-            "maturity_date": (datetime.now() + timedelta(days=random.randint(30, 10950))).strftime("%Y-%m-%d") if asset_class == "Fixed Income" else None,
-            "coupon_rate": round(random.uniform(0, 10), 3) if asset_class == "Fixed Income" else None,
-            "coupon_frequency": random.choice(["Annual", "Semi-Annual", "Quarterly"]) if asset_class == "Fixed Income" else None,
-            "yield_to_maturity": round(random.uniform(0, 8), 3) if asset_class == "Fixed Income" else None,
-            "duration": round(random.uniform(0.5, 30), 2) if asset_class == "Fixed Income" else None,
-            "credit_rating": random.choice(["AAA", "AA+", "AA", "AA-", "A+", "A", "BBB+", "BBB"]) if asset_class == "Fixed Income" else None,
-            
-            # Derivative specific
-            "underlying": f"INST{random.randint(1, count):06d}" if asset_class == "Derivative" else None,
-            "strike_price": round(random.uniform(50, 200), 2) if "Option" in str(asset_info.get("subtypes", [])) else None,
-            "expiry_date": (datetime.now() + timedelta(days=random.randint(1, 365))).strftime("%Y-%m-%d") if asset_class == "Derivative" else None,
-            "contract_size": random.choice([100, 1000, 10000]) if asset_class == "Derivative" else None,
-            
-            # Risk metrics
-            "var_95": round(random.uniform(1000, 100000), 2),
-            "var_99": round(random.uniform(2000, 200000), 2),
-            "beta": round(random.uniform(0.5, 2.0), 3) if asset_class == "Equity" else None,
-            "sharpe_ratio": round(random.uniform(-1, 3), 3) if asset_class == "Equity" else None,
-            
-            # Status
-            "status": random.choice(["Active", "Active", "Active", "Suspended", "Delisted"]),
-            "is_tradeable": random.random() < 0.95,
-            "last_updated": datetime.now().isoformat(),
-        }
-        
-        instruments.append(instrument)
+    def prices(low: float, high: float, digits: int = 2) -> List[float]:
+        span = high - low
+        return [round(low + span * rand(), digits) for _ in rows]
+    
+    def only(classes, values) -> List:
+        return [value if asset_class in classes else None
+                for asset_class, value in zip(asset_class_col, values)]
+    
+    def per_class(key: str) -> List[str]:
+        # One batch per asset class from its own pool, scattered back to its rows
+        column = [None] * count
+        for asset_class, positions in class_rows.items():
+            for i, value in zip(positions, choices(ASSET_CLASSES[asset_class][key], k=len(positions))):
+                column[i] = value
+        return column
+    
+    asset_class_col = choices(list(ASSET_CLASSES), k=count)
+    class_rows = {asset_class: [] for asset_class in ASSET_CLASSES}
+    for i, asset_class in enumerate(asset_class_col):
+        class_rows[asset_class].append(i)
     
-    return instruments
+    columns = {
+        # Identifiers
+        "instrument_id": [f"INST{i+1:06d}" for i in rows],
+        "isin": [f"{country}{number:010d}" for country, number in zip(
+            choices(['US', 'GB', 'DE', 'FR', 'JP'], k=count),
+            choices(range(1000000000, 10000000000), k=count))],
+        "cusip": only(("Equity", "Fixed Income"),
+                      [f"{n:09d}" for n in choices(range(100000000, 1000000000), k=count)]),
+        "sedol": [f"{n:07d}" if rand() < 0.5 else None for n in choices(range(1000000, 10000000), k=count)],
+        "bloomberg_ticker": [f"{ticker} {market} {asset_class[:3].upper()}" for ticker, market, asset_class in zip(
+            choices(['AAPL', 'MSFT', 'JPM', 'GS', 'DBK', 'NESN', 'SHEL'], k=count),
+            choices(['US', 'LN', 'GY', 'FP'], k=count),
+            asset_class_col)],
+        "reuters_ric": [f"{ticker}{'.' + suffix if rand() < 0.7 else ''}" for ticker, suffix in zip(
+            choices(['AAPL', 'MSFT', 'JPM', 'GS', 'DBK'], k=count),
+            choices(['N', 'L', 'DE', 'PA'], k=count))],
+        
+        # Classification
+        "asset_class": asset_class_col,
+        "instrument_type": per_class("subtypes"),
+        "sector": choices(["Technology", "Financials", "Healthcare", "Energy", "Consumer", "Industrials"], k=count),
+        "industry": choices(["Software", "Banking", "Pharma", "Oil & Gas", "Retail", "Aerospace"], k=count),
+        
+        # Description
+        "name": [f"{issuer} {subtype}"
+                 for issuer, subtype in zip(choices(ISSUERS, k=count), per_class("subtypes"))],
+        "description": [f"{subtype} issued by {issuer}"
+                        for issuer, subtype in zip(choices(ISSUERS, k=count), per_class("subtypes"))],
+        "issuer": choices(ISSUERS, k=count),
+        "issue_date": dates(range(30, 3651), sign=-1),
+        
+        # Trading info
+        "exchange": per_class("exchanges"),
+        "currency": per_class("currencies"),
+        "trading_currency": per_class("currencies"),
+        "settlement_currency": per_class("currencies"),
+        "tick_size": choices([0.01, 0.001, 0.0001, 0.00001], k=count),
+        "lot_size": choices([1, 10, 100, 1000], k=count),
+        "min_trade_size": choices([1, 10, 100, 1000], k=count),
+        
+        # Market data
+        "last_price": prices(1, 1000),
+        "bid_price": prices(1, 1000),
+        "ask_price": prices(1, 1000),
+        "volume": choices(range(10000, 10000001), k=count),
+        "market_cap": only(("Equity",), choices(range(1000000, 1000000000001), k=count)),
+        
+        # Fixed Income specific
+        "maturity_date": only(("Fixed Income",), dates(range(30, 10951))),
+        "coupon_rate": only(("Fixed Income",), prices(0, 10, 3)),
+        "coupon_frequency": only(("Fixed Income",), choices(["Annual", "Semi-Annual", "Quarterly"], k=count)),
+        "yield_to_maturity": only(("Fixed Income",), prices(0, 8, 3)),
+        "duration": only(("Fixed Income",), prices(0.5, 30)),
+        "credit_rating": only(("Fixed Income",), choices(["AAA", "AA+", "AA", "AA-", "A+", "A", "BBB+", "BBB"], k=count)),
+        
+        # Derivative specific
+        "underlying": only(("Derivative",), [f"INST{n:06d}" for n in choices(range(1, count + 1), k=count)]),
+        "strike_price": only(OPTION_CLASSES, prices(50, 200)),
+        "expiry_date": only(("Derivative",), dates(range(1, 366))),
+        "contract_size": only(("Derivative",), choices([100, 1000, 10000], k=count)),
+        
+        # Risk metrics
+        "var_95": prices(1000, 100000),
+        "var_99": prices(2000, 200000),
+        "beta": only(("Equity",), prices(0.5, 2.0, 3)),
+        "sharpe_ratio": only(("Equity",), prices(-1, 3, 3)),
+        
+        # Status
+        "status": choices(["Active", "Active", "Active", "Suspended", "Delisted"], k=count),
+        "is_tradeable": [rand() < 0.95 for _ in rows],
+        "last_updated": [now.isoformat()] * count,
+    }
+    
+    return columns
+
+TRADE_TYPES = ("Buy", "Sell", "Cross")
+TRADE_CONDITIONS = ("Regular", "Block", "Odd Lot")
+TICK_EXCHANGES = ("NYSE", "NASDAQ", "ARCA", "BATS")
+QUOTE_SIZES = range(100, 10001)
+TRADE_VOLUMES = range(100, 5001)
+TRADE_GAPS_MS = range(10, 101)
+
+def _draws(population, batch: int = 4096):
+    """Endless stream of random picks from population, drawn a batch at a time"""
+    while True:
+        yield from random.choices(population, k=batch)
 
 def generate_tick_data(
     ticker: str,
@@ -521,55 +688,111 @@ def generate_tick_data(
     ticks = []
     
     # Get stock info
-    stock = next((s for s in EU_LARGE_CAP_STOCKS if s['ticker'] == ticker), EU_LARGE_CAP_STOCKS[0])
+    stock = STOCKS_BY_TICKER.get(ticker, EU_LARGE_CAP_STOCKS[0])
     base_price = stock['price']
     
-    # Start time
+    # Start time - the tick clock runs in integer milliseconds from here
     start_time = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
-    end_time = start_time + timedelta(hours=hours)
+    end_ms = int(hours * 3_600_000)
+    interval_ms = 1000 // ticks_per_second
+    
+    # Bound once - the loop below runs hours * 3600 * ticks_per_second times
+    gauss, uniform, randint = random.gauss, random.uniform, random.randint
+    ticks_append = ticks.append
+    # Per-trade fields come from batched draws rather than a call each
+    trade_fields = zip(
+        _draws(QUOTE_SIZES), _draws(QUOTE_SIZES), _draws(TRADE_VOLUMES),
+        _draws(TRADE_TYPES), _draws(TRADE_CONDITIONS), _draws(TICK_EXCHANGES),
+        _draws(TRADE_GAPS_MS)
+    )
     
     # Generate ticks
-    current_time = start_time
+    current_ms = 0
     current_price = base_price
-    bid_price = base_price - 0.01
-    ask_price = base_price + 0.01
     
-    while current_time < end_time:
+    while current_ms < end_ms:
         # Random walk with mean reversion
-        price_change = random.gauss(0, 0.0001) - (current_price - base_price) * 0.001
-        current_price += price_change
+        current_price += gauss(0, 0.0001) - (current_price - base_price) * 0.001
         
         # Update bid/ask
-        spread = random.uniform(0.01, 0.03)
-        bid_price = current_price - spread/2
-        ask_price = current_price + spread/2
+        spread = uniform(0.01, 0.03)
+        bid_price = round(current_price - spread/2, 3)
+        ask_price = round(current_price + spread/2, 3)
         
         # Generate trades at this price level
-        num_trades = random.randint(0, 5)
+        num_trades = randint(0, 5)
         
-        for _ in range(num_trades):
-            tick = {
-                "timestamp": current_time.isoformat(),
+        for bid_size, ask_size, volume, trade_type, condition, exchange, gap_ms in islice(trade_fields, num_trades):
+            ticks_append({
+                "timestamp": (start_time + timedelta(milliseconds=current_ms)).isoformat(),
                 "ticker": ticker,
-                "price": round(current_price + random.uniform(-0.005, 0.005), 3),
-                "bid": round(bid_price, 3),
-                "ask": round(ask_price, 3),
-                "bid_size": random.randint(100, 10000),
-                "ask_size": random.randint(100, 10000),
-                "volume": random.randint(100, 5000),
-                "trade_type": random.choice(["Buy", "Sell", "Cross"]),
-                "condition": random.choice(["Regular", "Block", "Odd Lot"]),
-                "exchange": random.choice(["NYSE", "NASDAQ", "ARCA", "BATS"])
-            }
-            ticks.append(tick)
+                "price": round(current_price + uniform(-0.005, 0.005), 3),
+                "bid": bid_price,
+                "ask": ask_price,
+                "bid_size": bid_size,
+                "ask_size": ask_size,
+                "volume": volume,
+                "trade_type": trade_type,
+                "condition": condition,
+                "exchange": exchange
+            })
             
-            current_time += timedelta(milliseconds=random.randint(10, 100))
+            current_ms += gap_ms
         
         # Move to next tick interval
-        current_time += timedelta(milliseconds=1000 // ticks_per_second)
+        current_ms += interval_ms
     
     return ticks
 
+# ============== Output ==============
+
+def dumps_json(record: Dict) -> bytes:
+    """Encode one record as JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        # Both paths write compact JSON with datetimes through str(), so records
+        # only differ in how tiny or huge floats are spelled (0.00001 vs 1e-05)
+        return orjson.dumps(record, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(record, default=str, separators=(',', ':'), ensure_ascii=False).encode()
+
+def write_json(records: Iterable[Dict], filename: str):
+    """Stream records into a JSON array, one object per line"""
+    with open(filename, 'wb') as f:
+        f.write(b'[\n')
+        separator = b''
+        for record in records:
+            f.write(separator + dumps_json(record))
+            separator = b',\n'
+        f.write(b'\n]\n')
+
+def write_jsonl(records: Iterable[Dict], filename: str):
+    """Write records as JSON lines"""
+    with open(filename, 'wb') as f:
+        for record in records:
+            f.write(dumps_json(record) + b'\n')
+
+def write_csv(records: Iterable[Dict], filename: str):
+    """Write records as CSV, header taken from the first record - no records leaves an empty file"""
+    records = iter(records)
+    with open(filename, 'w', newline='') as f:
+        first = next(records, None)
+        if first is None:
+            return
+        # A plain writer over itemgetter rows skips DictWriter's per-row key checks
+        fieldnames = list(first)
+        row = itemgetter(*fieldnames) if len(fieldnames) > 1 else lambda record: (record[fieldnames[0]],)
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerow(row(first))
+        writer.writerows(map(row, records))
+
+def write_records(records: Iterable[Dict], filename: str, fmt: str):
+    if fmt == "json":
+        write_json(records, filename)
+    elif fmt == "jsonl":
+        write_jsonl(records, filename)
+    else:
+        write_csv(records, filename)
+
 # ============== Main Entry Point ==============
 
 def main():
@@ -581,6 +804,9 @@ Examples:
   # Generate VWAP algo execution
   python generate_financial_data.py --mode vwap --ticker ASML.AS --quantity 100000
   
+  # Generate 200 independent VWAP executions across all cores
+  python generate_financial_data.py --mode vwap --executions 200
+  
   # Generate instrument reference data
   python generate_financial_data.py --mode instruments --count 500
   
@@ -605,79 +831,82 @@ Examples:
     parser.add_argument("--side", choices=["Buy", "Sell"], help="Order side")
     parser.add_argument("--client", type=str, help="Client name")
     parser.add_argument("--hours", type=float, default=1.0, help="Hours of tick data")
-    parser.add_argument("--format", choices=["json", "csv"], default="json", help="Output format")
+    parser.add_argument("--executions", type=int, default=1, help="Independent VWAP executions to generate")
+    parser.add_argument("--workers", type=int, help="Worker processes for --executions > 1 (default: CPU count)")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible output")
+    parser.add_argument("--format", choices=["json", "jsonl", "csv"], default="json", help="Output format")
     parser.add_argument("--output", type=str, help="Output filename")
     
     args = parser.parse_args()
     
+    # VWAP simulators carry their own generators, the other modes use the module one
+    if args.seed is not None:
+        random.seed(args.seed)
+    
     # Generate data based on mode
     if args.mode == "vwap":
-        print(f"Generating VWAP execution flow...")
-        orders, fills = generate_vwap_execution(
-            ticker=args.ticker,
-            quantity=args.quantity,
-            side=args.side,
-            client=args.client
-        )
+        if args.executions > 1:
+            print(f"Generating {args.executions} VWAP execution flows...")
+            orders, fills = generate_vwap_executions(
+                args.executions,
+                args.workers,
+                ticker=args.ticker,
+                quantity=args.quantity,
+                side=args.side,
+                client=args.client,
+                seed=args.seed
+            )
+        else:
+            print(f"Generating VWAP execution flow...")
+            orders, fills = generate_vwap_execution(
+                ticker=args.ticker,
+                quantity=args.quantity,
+                side=args.side,
+                client=args.client,
+                seed=args.seed
+            )
         
         # Save orders and fills
         output_base = args.output or f"vwap_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         # Save orders
         orders_file = f"{output_base}_orders.{args.format}"
-        if args.format == "json":
-            with open(orders_file, 'w') as f:
-                json.dump(orders, f, indent=2, default=str)
-        else:
-            with open(orders_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=orders[0].keys())
-                writer.writeheader()
-                writer.writerows(orders)
+        write_records(orders, orders_file, args.format)
         
         # Save fills
         fills_file = f"{output_base}_fills.{args.format}"
-        if args.format == "json":
-            with open(fills_file, 'w') as f:
-                json.dump(fills, f, indent=2, default=str)
-        else:
-            with open(fills_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fills[0].keys())
-                writer.writeheader()
-                writer.writerows(fills)
+        write_records(fills, fills_file, args.format)
         
         print(f"✅ Generated {len(orders)} orders in {orders_file}")
         print(f"✅ Generated {len(fills)} fills in {fills_file}")
         
-        # Summary
-        total_filled = sum(f['quantity'] for f in fills)
-        avg_price = sum(f['quantity'] * f['price'] for f in fills) / total_filled if total_filled > 0 else 0
+        # Summary - one pass over the fills for every figure
+        total_filled = 0
+        notional = 0.0
+        venues = set()
+        for f in fills:
+            total_filled += f['quantity']
+            notional += f['quantity'] * f['price']
+            venues.add(f['venue'])
+        avg_price = notional / total_filled if total_filled > 0 else 0
         print(f"\n📊 Execution Summary:")
         print(f"  Total Filled: {total_filled:,}")
         print(f"  Average Price: {avg_price:.2f}")
-        print(f"  Child Orders: {len([o for o in orders if o.get('parent_order_id')])}")
-        print(f"  Venues Used: {len(set(f['venue'] for f in fills))}")
+        print(f"  Child Orders: {sum(1 for o in orders if o.get('parent_order_id'))}")
+        print(f"  Venues Used: {len(venues)}")
         
     elif args.mode == "instruments":
         print(f"Generating {args.count} instrument reference records...")
-        instruments = generate_instrument_reference_data(args.count)
+        instruments = instrument_reference_columns(args.count)
         
         output_file = args.output or f"instruments_{args.count}.{args.format}"
+        write_records(_rows(instruments), output_file, args.format)
         
-        if args.format == "json":
-            with open(output_file, 'w') as f:
-                json.dump(instruments, f, indent=2, default=str)
-        else:
-            with open(output_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=instruments[0].keys())
-                writer.writeheader()
-                writer.writerows(instruments)
-        
-        print(f"✅ Generated {len(instruments)} instruments in {output_file}")
+        print(f"✅ Generated {args.count} instruments in {output_file}")
         
         # Summary by asset class
         asset_classes = {}
-        for inst in instruments:
-            ac = inst['asset_class']
+        for ac in instruments['asset_class']:
             asset_classes[ac] = asset_classes.get(ac, 0) + 1
         
         print(f"\n📊 Asset Class Distribution:")
@@ -691,25 +920,27 @@ Examples:
         ticks = generate_tick_data(ticker, args.hours)
         
         output_file = args.output or f"ticks_{ticker.replace('.', '_')}_{args.hours}h.{args.format}"
-        
-        if args.format == "json":
-            with open(output_file, 'w') as f:
-                json.dump(ticks, f, indent=2, default=str)
-        else:
-            with open(output_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=ticks[0].keys())
-                writer.writeheader()
-                writer.writerows(ticks)
+        write_records(ticks, output_file, args.format)
         
         print(f"✅ Generated {len(ticks)} ticks in {output_file}")
         
-        # Summary
+        # Summary - one pass over the ticks
         if ticks:
-            prices = [t['price'] for t in ticks]
+            low = high = ticks[0]['price']
+            price_total = 0.0
+            total_volume = 0
+            for t in ticks:
+                price = t['price']
+                if price < low:
+                    low = price
+                elif price > high:
+                    high = price
+                price_total += price
+                total_volume += t['volume']
             print(f"\n📊 Tick Summary:")
-            print(f"  Price Range: {min(prices):.2f} - {max(prices):.2f}")
-            print(f"  Avg Price: {sum(prices)/len(prices):.2f}")
-            print(f"  Total Volume: {sum(t['volume'] for t in ticks):,}")
+            print(f"  Price Range: {low:.2f} - {high:.2f}")
+            print(f"  Avg Price: {price_total/len(ticks):.2f}")
+            print(f"  Total Volume: {total_volume:,}")
     
     elif args.mode == "general":
         # Import and use the original generate_trades function
@@ -721,15 +952,7 @@ Examples:
         trades = generate_trades(args.count)
         
         output_file = args.output or f"trades_{args.count}.{args.format}"
-        
-        if args.format == "json":
-            with open(output_file, 'w') as f:
-                json.dump(trades, f, indent=2, default=str)
-        else:
-            with open(output_file, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=trades[0].keys())
-                writer.writeheader()
-                writer.writerows(trades)
+        write_records(trades, output_file, args.format)
         
         print(f"✅ Generated {len(trades)} trades in {output_file}")
 
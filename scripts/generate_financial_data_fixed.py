@@ -10,9 +10,16 @@ import random
 import sys
 import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, fields
 from enum import Enum
+from itertools import accumulate
+from operator import attrgetter
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
 
 class OrderState(Enum):
     """Order lifecycle states"""
@@ -36,9 +43,9 @@ class Venue(Enum):
     IEX = "IEX"
     DARK_POOL = "DarkPool"
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    """Order data structure with proper hierarchy"""
+    """Order data structure with proper hierarchy - slotted, a run keeps every order alive"""
     order_id: str                    # This order's unique ID
     parent_order_id: Optional[str]   # Points to immediate parent
     client_order_id: str             # Original client ID - NEVER CHANGES
@@ -55,8 +62,8 @@ class Order:
     state: str
     venue: Optional[str]
     algo_type: Optional[str]
-    timestamp: datetime
-    update_timestamp: datetime
+    timestamp: int                   # Wall-clock ms since 1970-01-01, see to_ms
+    update_timestamp: int
     
     # Additional fields
     average_price: float = 0.0
@@ -69,6 +76,31 @@ class Order:
     
     def __post_init__(self):
         self.remaining_quantity = self.quantity - self.filled_quantity
+    
+    def to_dict(self) -> Dict:
+        """Flat dict of the fields with ISO times - asdict's reflection and deep copy are wasted here"""
+        record = dict(zip(ORDER_FIELDS, _order_values(self)))
+        record['timestamp'] = iso_ms(self.timestamp)
+        record['update_timestamp'] = iso_ms(self.update_timestamp)
+        return record
+
+# Simulation clock - times are integer wall-clock milliseconds, rendered as
+# ISO strings only when a record is written
+EPOCH = datetime(1970, 1, 1)
+MS_PER_SECOND = 1000
+MS_PER_MINUTE = 60 * MS_PER_SECOND
+MS_PER_HOUR = 60 * MS_PER_MINUTE
+
+def to_ms(moment: datetime) -> int:
+    """Naive datetime to milliseconds, kept on the wall clock - no timezone lookup"""
+    return (moment - EPOCH) // timedelta(milliseconds=1)
+
+def iso_ms(ms: int) -> str:
+    """Milliseconds from to_ms back to an ISO timestamp"""
+    return (EPOCH + timedelta(milliseconds=ms)).isoformat()
+
+ORDER_FIELDS = tuple(field.name for field in fields(Order))
+_order_values = attrgetter(*ORDER_FIELDS)
 
 # Market data
 EU_LARGE_CAP_STOCKS = [
@@ -84,42 +116,96 @@ CLIENTS = [
 TRADERS = [f"TRD{i:03d}" for i in range(1, 21)]
 DESKS = ["Equity Trading", "Program Trading", "Electronic Trading"]
 
-def get_vwap_profile() -> List[float]:
-    """VWAP volume distribution for a trading day"""
-    return [
-        0.12,  # 9:00-10:00 - Opening
-        0.09,  # 10:00-11:00
-        0.08,  # 11:00-12:00
-        0.06,  # 12:00-13:00 - Lunch
-        0.07,  # 13:00-14:00
-        0.08,  # 14:00-15:00
-        0.09,  # 15:00-16:00
-        0.10,  # 16:00-17:00
-        0.15,  # 17:00-17:30 - Close prep
-        0.16,  # 17:30 - Closing auction
-    ]
+# VWAP volume distribution for a trading day
+VWAP_PROFILE = (
+    0.12,  # 9:00-10:00 - Opening
+    0.09,  # 10:00-11:00
+    0.08,  # 11:00-12:00
+    0.06,  # 12:00-13:00 - Lunch
+    0.07,  # 13:00-14:00
+    0.08,  # 14:00-15:00
+    0.09,  # 15:00-16:00
+    0.10,  # 16:00-17:00
+    0.15,  # 17:00-17:30 - Close prep
+    0.16,  # 17:30 - Closing auction
+)
+# Basis points of the day done by the end of each hour - integers, so the
+# hour boundaries below carry no float error
+VWAP_CUMULATIVE_BP = tuple(round(share * 10_000) for share in accumulate(VWAP_PROFILE))
+
+def hour_quantities(quantity: int) -> List[int]:
+    """
+    Split a quantity across the VWAP hours
+    
+    Cutting at cumulative boundaries rather than truncating each hour's
+    share on its own means the hours add up to the whole order.
+    """
+    bounds = [0] + [quantity * bp // 10_000 for bp in VWAP_CUMULATIVE_BP]
+    return [end - start for start, end in zip(bounds, bounds[1:])]
+
+# SOR venues and the share of the remaining quantity each is offered when picked
+SOR_VENUE_WEIGHTS = {
+    Venue.NYSE: 0.35,
+    Venue.NASDAQ: 0.25,
+    Venue.ARCA: 0.15,
+    Venue.BATS: 0.10,
+    Venue.DARK_POOL: 0.10,
+    Venue.IEX: 0.05,
+}
+SOR_VENUES = tuple(SOR_VENUE_WEIGHTS)
+
+BASE_PRICE = 650.0  # Default for ASML
+
+SLICES_PER_HOUR = range(2, 6)
+SLICE_JITTER_MINUTES = range(0, 6)
+ORDER_DELAYS_MS = range(1, 101)
+UPDATE_DELAYS_MS = range(100, 501)
+FILL_DELAYS_MS = range(100, 1001)
+COUNTERPARTIES = ("MM01", "MM02", "HFT01")
 
 class VWAPAlgoSimulator:
     """Simulates VWAP with proper order hierarchy"""
     
     def __init__(self, client_order_id: str, ticker: str, quantity: int, 
-                 side: str, client_name: str, start_time: datetime):
+                 side: str, client_name: str, start_time: datetime,
+                 rng: Optional[random.Random] = None):
         self.client_order_id = client_order_id  # This NEVER changes
         self.ticker = ticker
         self.quantity = quantity
         self.side = side
         self.client_name = client_name
         self.start_time = start_time
-        self.vwap_profile = get_vwap_profile()
+        # Order ids carry epoch seconds - resolve the start once and add offsets
+        self.start_epoch = int(start_time.timestamp())
+        self.start_ms = to_ms(start_time)
+        # Buys pay half the spread, sells give it up - fixed for the whole run
+        half_spread = BASE_PRICE * 0.0005 / 2
+        self.spread_adjustment = half_spread if side == "Buy" else -half_spread
+        # Defaults to the module generator, so random.seed() still governs a run
+        self.rng = rng or random
         
         self.orders = []
         self.fills = []
         self.order_counter = 0
         
-    def generate_execution(self) -> Tuple[List[Dict], List[Dict]]:
-        """Generate complete execution with proper hierarchy"""
+    def generate_execution(self) -> Tuple[List[Order], List[Dict]]:
+        """Generate complete execution with proper hierarchy, root orders first"""
+        for orders, fills in self.iter_execution():
+            self.orders.extend(orders)
+            self.fills.extend(fills)
+        # iter_execution ends with the client and algo parent orders
+        self.orders = self.orders[-2:] + self.orders[:-2]
+        return self.orders, self.fills
+    
+    def iter_execution(self) -> Iterator[Tuple[List[Order], List[Dict]]]:
+        """
+        Yield the execution an algo child at a time, as (orders, fills)
+        
+        The client and algo parent orders come last, once the day's fills
+        have settled their final state.
+        """
         
-        current_time = self.start_time
+        current_time = self.start_ms
         
         # 1. CLIENT ORDER (Level 0) - Original from buy-side client
         client_order = Order(
@@ -141,16 +227,15 @@ class VWAPAlgoSimulator:
             timestamp=current_time,
             update_timestamp=current_time,
             client_name=self.client_name,
-            trader=random.choice(TRADERS),
-            desk=random.choice(DESKS),
+            trader=self.rng.choice(TRADERS),
+            desk=self.rng.choice(DESKS),
             strategy="VWAP",
             order_level=0
         )
-        self.orders.append(asdict(client_order))
         
         # 2. ALGO PARENT ORDER (Level 1) - Sell-side creates algo order
-        current_time += timedelta(seconds=1)
-        algo_parent_id = f"ALGO_{current_time.timestamp():.0f}"
+        current_time += MS_PER_SECOND
+        algo_parent_id = f"ALGO_{self.start_epoch + 1}"
         algo_parent = Order(
             order_id=algo_parent_id,
             parent_order_id=client_order.order_id,  # Points to client order
@@ -175,42 +260,44 @@ class VWAPAlgoSimulator:
             strategy="VWAP",
             order_level=1
         )
-        self.orders.append(asdict(algo_parent))
         
         # Update client order state
-        self.orders[0]['state'] = OrderState.ACCEPTED.value
-        self.orders[0]['update_timestamp'] = current_time.isoformat()
+        client_order.state = OrderState.ACCEPTED.value
+        client_order.update_timestamp = current_time
         
         # 3. Generate ALGO CHILD ORDERS (Level 2) throughout the day
         total_filled = 0
+        # Slice counts for the whole day in one draw (2-5 slices per hour)
+        slice_counts = self.rng.choices(SLICES_PER_HOUR, k=len(VWAP_PROFILE))
         
-        for hour_idx, participation_rate in enumerate(self.vwap_profile):
-            hour_quantity = int(self.quantity * participation_rate)
-            
+        for hour_idx, (hour_quantity, num_slices) in enumerate(zip(hour_quantities(self.quantity), slice_counts)):
             if hour_quantity == 0 or total_filled >= self.quantity:
                 continue
             
-            # Create multiple slices per hour
-            num_slices = random.randint(2, 5)
+            # Create multiple slices per hour, drawing the hour's timing
+            # jitter and size wobble for every slice at once
             slice_size = hour_quantity // num_slices
+            jitters = self.rng.choices(SLICE_JITTER_MINUTES, k=num_slices)
+            size_deltas = self.rng.choices(range(-slice_size // 4, slice_size // 4 + 1), k=num_slices)
             
-            for slice_idx in range(num_slices):
+            for slice_idx, (jitter, size_delta) in enumerate(zip(jitters, size_deltas)):
                 if total_filled >= self.quantity:
                     break
                 
                 # Calculate timing
-                minutes_offset = (60 // num_slices) * slice_idx + random.randint(0, 5)
-                order_time = self.start_time + timedelta(hours=hour_idx, minutes=minutes_offset)
+                minutes_offset = (60 // num_slices) * slice_idx + jitter
+                order_time = self.start_ms + hour_idx * MS_PER_HOUR + minutes_offset * MS_PER_MINUTE
+                order_epoch = self.start_epoch + hour_idx * 3600 + minutes_offset * 60
                 
                 # Determine slice quantity
                 remaining = self.quantity - total_filled
-                slice_qty = min(slice_size + random.randint(-slice_size//4, slice_size//4), remaining)
+                slice_qty = min(slice_size + size_delta, remaining)
                 
                 if slice_qty <= 0:
                     continue
                 
                 # Create ALGO CHILD ORDER (Level 2)
-                algo_child_id = f"ALGOCHILD_{order_time.timestamp():.0f}_{self.order_counter}"
+                algo_child_id = f"ALGOCHILD_{order_epoch}_{self.order_counter}"
                 self.order_counter += 1
                 
                 algo_child = Order(
@@ -237,71 +324,63 @@ class VWAPAlgoSimulator:
                     strategy="VWAP Slice",
                     order_level=2
                 )
-                self.orders.append(asdict(algo_child))
                 
                 # 4. Route to SOR - create SOR CHILD ORDERS (Level 3)
-                sor_orders, sor_fills = self._route_to_sor(algo_child, order_time)
-                self.orders.extend(sor_orders)
-                self.fills.extend(sor_fills)
+                sor_orders, sor_fills, child_filled = self._route_to_sor(algo_child, order_time, order_epoch)
                 
                 # Update algo child with fills
-                child_filled = sum(f['quantity'] for f in sor_fills)
-                algo_child_dict = self.orders[-len(sor_orders)-1]  # Get the algo child we just added
-                algo_child_dict['filled_quantity'] = child_filled
-                algo_child_dict['remaining_quantity'] = slice_qty - child_filled
-                algo_child_dict['state'] = OrderState.FILLED.value if child_filled >= slice_qty else OrderState.PARTIALLY_FILLED.value
-                algo_child_dict['update_timestamp'] = (order_time + timedelta(seconds=1)).isoformat()
+                algo_child.filled_quantity = child_filled
+                algo_child.remaining_quantity = slice_qty - child_filled
+                algo_child.state = OrderState.FILLED.value if child_filled >= slice_qty else OrderState.PARTIALLY_FILLED.value
+                algo_child.update_timestamp = order_time + MS_PER_SECOND
                 
                 total_filled += child_filled
+                yield [algo_child] + sor_orders, sor_fills
         
-        # 5. Update parent orders with final fills
-        # Update algo parent
-        for order in self.orders:
-            if order['order_id'] == algo_parent_id:
-                order['filled_quantity'] = total_filled
-                order['remaining_quantity'] = self.quantity - total_filled
-                order['state'] = OrderState.FILLED.value if total_filled >= self.quantity else OrderState.PARTIALLY_FILLED.value
-                order['update_timestamp'] = (self.start_time + timedelta(hours=8, minutes=30)).isoformat()
-                break
-        
-        # Update client order
-        self.orders[0]['filled_quantity'] = total_filled
-        self.orders[0]['remaining_quantity'] = self.quantity - total_filled
-        self.orders[0]['state'] = OrderState.FILLED.value if total_filled >= self.quantity else OrderState.PARTIALLY_FILLED.value
-        self.orders[0]['update_timestamp'] = (self.start_time + timedelta(hours=8, minutes=30)).isoformat()
+        # 5. Update parent orders with final fills - both are still held
+        # directly, so there is nothing to search the order list for
+        final_state = OrderState.FILLED.value if total_filled >= self.quantity else OrderState.PARTIALLY_FILLED.value
+        final_time = self.start_ms + 8 * MS_PER_HOUR + 30 * MS_PER_MINUTE
+        for order in (algo_parent, client_order):
+            order.filled_quantity = total_filled
+            order.remaining_quantity = self.quantity - total_filled
+            order.state = final_state
+            order.update_timestamp = final_time
         
-        return self.orders, self.fills
+        yield [client_order, algo_parent], []
     
-    def _route_to_sor(self, algo_child: Order, timestamp: datetime) -> Tuple[List[Dict], List[Dict]]:
-        """Smart Order Router - splits to venues"""
+    def _route_to_sor(self, algo_child: Order, timestamp: int,
+                      epoch: int) -> Tuple[List[Order], List[Dict], int]:
+        """Smart Order Router - splits to venues, returning the orders, fills and quantity filled"""
         sor_orders = []
         sor_fills = []
         
-        venue_distribution = {
-            Venue.NYSE: 0.35,
-            Venue.NASDAQ: 0.25,
-            Venue.ARCA: 0.15,
-            Venue.BATS: 0.10,
-            Venue.DARK_POOL: 0.10,
-            Venue.IEX: 0.05,
-        }
-        
         remaining_qty = algo_child.quantity
-        venues = list(venue_distribution.keys())
-        random.shuffle(venues)
+        venues = self.rng.sample(SOR_VENUES, self.rng.randint(1, 3))  # Use 1-3 venues
+        
+        # Every per-venue random field, drawn for all of the venues at once
+        count = len(venues)
+        rng = self.rng
+        size_factors = [rng.uniform(0.8, 1.2) for _ in venues]
+        price_moves = [rng.gauss(0, 0.002) for _ in venues]
+        order_delays = rng.choices(ORDER_DELAYS_MS, k=count)
+        update_delays = rng.choices(UPDATE_DELAYS_MS, k=count)
+        fill_delays = rng.choices(FILL_DELAYS_MS, k=count)
+        counterparties = rng.choices(COUNTERPARTIES, k=count)
         
-        for venue in venues[:random.randint(1, 3)]:  # Use 1-3 venues
+        for venue, size_factor, price_move, order_delay, update_delay, fill_delay, counterparty in zip(
+                venues, size_factors, price_moves, order_delays, update_delays, fill_delays, counterparties):
             if remaining_qty <= 0:
                 break
             
-            venue_qty = int(remaining_qty * venue_distribution[venue] * random.uniform(0.8, 1.2))
+            venue_qty = int(remaining_qty * SOR_VENUE_WEIGHTS[venue] * size_factor)
             venue_qty = min(venue_qty, remaining_qty)
             
             if venue_qty <= 0:
                 continue
             
             # Create SOR CHILD ORDER (Level 3)
-            sor_order_id = f"SOR_{timestamp.timestamp():.0f}_{venue.value}_{self.order_counter}"
+            sor_order_id = f"SOR_{epoch}_{venue.value}_{self.order_counter}"
             self.order_counter += 1
             
             sor_order = Order(
@@ -314,14 +393,14 @@ class VWAPAlgoSimulator:
                 quantity=venue_qty,
                 filled_quantity=venue_qty,  # Assume immediate fill
                 remaining_quantity=0,
-                price=self._calculate_execution_price(timestamp),
+                price=self._calculate_execution_price(price_move),
                 order_type="Market",
                 tif="IOC",
                 state=OrderState.FILLED.value,
                 venue=venue.value,
                 algo_type=None,
-                timestamp=timestamp + timedelta(milliseconds=random.randint(1, 100)),
-                update_timestamp=timestamp + timedelta(milliseconds=random.randint(100, 500)),
+                timestamp=timestamp + order_delay,
+                update_timestamp=timestamp + update_delay,
                 client_name=algo_child.client_name,
                 trader=algo_child.trader,
                 desk=algo_child.desk,
@@ -329,7 +408,7 @@ class VWAPAlgoSimulator:
                 order_level=3
             )
             
-            sor_orders.append(asdict(sor_order))
+            sor_orders.append(sor_order)
             
             # Generate fills
             fill = {
@@ -343,8 +422,8 @@ class VWAPAlgoSimulator:
                 "quantity": venue_qty,
                 "price": sor_order.price,
                 "venue": venue.value,
-                "timestamp": (timestamp + timedelta(milliseconds=random.randint(100, 1000))).isoformat(),
-                "counterparty": random.choice(["MM01", "MM02", "HFT01"]),
+                "timestamp": iso_ms(timestamp + fill_delay),
+                "counterparty": counterparty,
                 "commission": round(venue_qty * sor_order.price * 0.0002, 2),
                 "fees": round(venue_qty * sor_order.price * 0.00003, 2),
             }
@@ -352,44 +431,86 @@ class VWAPAlgoSimulator:
             
             remaining_qty -= venue_qty
         
-        return sor_orders, sor_fills
+        return sor_orders, sor_fills, algo_child.quantity - remaining_qty
     
-    def _calculate_execution_price(self, timestamp: datetime) -> float:
-        """Calculate realistic execution price"""
-        base_price = 650.0  # Default for ASML
-        price_move = random.gauss(0, 0.002)
-        spread = base_price * 0.0005
-        
-        if self.side == "Buy":
-            price = base_price * (1 + price_move) + spread/2
-        else:
-            price = base_price * (1 + price_move) - spread/2
-        
-        return round(price, 2)
+    def _calculate_execution_price(self, price_move: float) -> float:
+        """Calculate realistic execution price from a pre-drawn price move"""
+        return round(BASE_PRICE * (1 + price_move) + self.spread_adjustment, 2)
 
-def generate_vwap_execution_fixed(
+def _vwap_simulator(
     client_order_id: str = None,
     ticker: str = "ASML.AS",
     quantity: int = 100000,
     side: str = "Buy",
     client: str = "Blackrock Asset Management",
-    start_time: datetime = None
-) -> Tuple[List[Dict], List[Dict]]:
-    """Generate VWAP execution with proper order hierarchy"""
-    
-    client_order_id = client_order_id or f"C{random.randint(100000, 999999)}"
+    start_time: datetime = None,
+    rng: Optional[random.Random] = None
+) -> VWAPAlgoSimulator:
+    """Simulator for one client order, filling in random defaults"""
+    rng = rng or random
+    client_order_id = client_order_id or f"C{rng.randint(100000, 999999)}"
     start_time = start_time or datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
     
-    simulator = VWAPAlgoSimulator(
+    return VWAPAlgoSimulator(
         client_order_id=client_order_id,
         ticker=ticker,
         quantity=quantity,
         side=side,
         client_name=client,
-        start_time=start_time
+        start_time=start_time,
+        rng=rng
     )
+
+def generate_vwap_execution_fixed(
+    client_order_id: str = None,
+    ticker: str = "ASML.AS",
+    quantity: int = 100000,
+    side: str = "Buy",
+    client: str = "Blackrock Asset Management",
+    start_time: datetime = None,
+    rng: Optional[random.Random] = None
+) -> Tuple[List[Order], List[Dict]]:
+    """Generate VWAP execution with proper order hierarchy"""
+    return _vwap_simulator(client_order_id, ticker, quantity, side, client, start_time, rng).generate_execution()
+
+def iter_vwap_execution_fixed(**kwargs) -> Iterator[Tuple[List[Order], List[Dict]]]:
+    """Same execution and arguments as generate_vwap_execution_fixed, yielded in (orders, fills) batches"""
+    return _vwap_simulator(**kwargs).iter_execution()
+
+def dumps_json(record) -> bytes:
+    """Encode one record as indented JSON, using orjson when it is installed"""
+    if isinstance(record, Order):
+        record = record.to_dict()  # renders the integer times
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_INDENT_2)
+    return json.dumps(record, indent=2).encode()
+
+class JsonArrayWriter:
+    """
+    Writes records into a JSON array file as they arrive
+    
+    The layout matches dumping the whole list with indent=2, without the
+    list ever being held in memory.
+    """
+    
+    def __init__(self, filename: str):
+        self.file = open(filename, 'wb')
+        self.file.write(b'[')
+        self.count = 0
+    
+    def write(self, record):
+        self.file.write((b',\n  ' if self.count else b'\n  ') + dumps_json(record).replace(b'\n', b'\n  '))
+        self.count += 1
+    
+    def close(self):
+        self.file.write(b'\n]' if self.count else b']')
+        self.file.close()
     
-    return simulator.generate_execution()
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
 
 def main():
     parser = argparse.ArgumentParser(description="Generate VWAP execution with proper hierarchy")
@@ -405,7 +526,7 @@ def main():
     print(f"Generating VWAP execution with proper hierarchy...")
     print(f"Client Order ID: {args.client_order_id} (will cascade to all children)")
     
-    orders, fills = generate_vwap_execution_fixed(
+    batches = iter_vwap_execution_fixed(
         client_order_id=args.client_order_id,
         ticker=args.ticker,
         quantity=args.quantity,
@@ -413,33 +534,32 @@ def main():
         client=args.client
     )
     
-    # Save orders
+    # Stream orders and fills to disk as they are generated, tallying the
+    # summary on the way - the client and algo parent orders are written last
     orders_file = f"{args.output}_orders.json"
-    with open(orders_file, 'w') as f:
-        json.dump(orders, f, indent=2, default=str)
-    
-    # Save fills
     fills_file = f"{args.output}_fills.json"
-    with open(fills_file, 'w') as f:
-        json.dump(fills, f, indent=2, default=str)
+    level_counts = {}
+    client_ids = set()
+    with JsonArrayWriter(orders_file) as orders_out, JsonArrayWriter(fills_file) as fills_out:
+        for orders, fills in batches:
+            for order in orders:
+                orders_out.write(order)
+                level_counts[order.order_level] = level_counts.get(order.order_level, 0) + 1
+                client_ids.add(order.client_order_id)
+            for fill in fills:
+                fills_out.write(fill)
     
-    print(f"\n✅ Generated {len(orders)} orders in {orders_file}")
-    print(f"✅ Generated {len(fills)} fills in {fills_file}")
+    print(f"\n✅ Generated {orders_out.count} orders in {orders_file}")
+    print(f"✅ Generated {fills_out.count} fills in {fills_file}")
     
     # Show hierarchy
     print(f"\n📊 Order Hierarchy:")
-    level_counts = {}
-    for order in orders:
-        level = order.get('order_level', 0)
-        level_counts[level] = level_counts.get(level, 0) + 1
-    
     print(f"  Level 0 (Client):     {level_counts.get(0, 0)} orders")
     print(f"  Level 1 (Algo Parent): {level_counts.get(1, 0)} orders")
     print(f"  Level 2 (Algo Child):  {level_counts.get(2, 0)} orders")
     print(f"  Level 3 (SOR Child):   {level_counts.get(3, 0)} orders")
     
     # Verify client_order_id cascades
-    client_ids = set(o['client_order_id'] for o in orders)
     print(f"\n✅ Client Order ID preserved: {len(client_ids)} unique = {'YES' if len(client_ids) == 1 else 'NO'}")
     if len(client_ids) == 1:
         print(f"  All orders have client_order_id: {list(client_ids)[0]}")